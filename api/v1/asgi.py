@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+"""
+ASGI entry point for the api
+
+Serves the chat routes with async handlers, so a request waiting on the
+LLM does not hold an OS thread. Routes without an async handler, such as
+file uploads, are passed through to the Flask app.
+"""
+import re
+import time
+import asyncio
+from os import getenv
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.wsgi import WSGIMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from api.v1.app import app as flask_app
+from models.research.retrieval import vectorstores, embeddings, faculty_index
+from models.research.answer_cache import answer_cache
+from models.research.sql_chain import sql_engine
+from api.v1.views.general_page import (
+    qa_bot,
+    logger,
+    active_sessions,
+    start_turn,
+    answer_turn,
+    finish_turn,
+    error_message,
+    generated_token,
+    sse_event,
+    get_user_conversations,
+    get_conversation_history,
+)
+from database import run_db
+
+app = FastAPI()
+app.add_middleware(
+    CORSMiddleware,
+    allow_origin_regex=".*",
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"],
+    allow_headers=["Content-Type", "Authorization", "x-csrf-token"],
+)
+
+
+def clean_id(value):
+    """
+    Replaces characters that are not allowed in IDs
+    """
+    return re.sub(r'[^\w@.-]', '_', value)
+
+
+@app.get("/api/home")
+async def landing_page():
+    """
+    Fetches the necessary data to render the landing page
+    """
+    return {"SuperVaani": "Plaksha"}
+
+
+@app.get("/api/ready")
+async def readiness():
+    """
+    Reports the load state of each vectorstore; 503 until all are loaded
+    """
+    status = {
+        "ready": vectorstores.ready(),
+        "embedding_model_loaded": vectorstores.embeddings_ready(),
+        "indexes": vectorstores.status()
+    }
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/api/cache/metrics")
+async def cache_metrics():
+    """
+    Reports hit rates of the retrieval, answer and SQL caches and SQL repair attempts
+    """
+    return {
+        "query_embeddings": embeddings.stats(),
+        "answers": answer_cache.stats(),
+        "sql": sql_engine.cache.stats(),
+        "sql_attempts": sql_engine.attempts.stats(),
+        "faculty_index": faculty_index.stats()
+    }
+
+
+@app.get("/api/sessions/metrics")
+async def get_session_metrics():
+    """
+    Reports hit, miss, eviction and expiration counts of the session cache
+    """
+    return active_sessions.stats()
+
+
+async def stream_supervaani(supervaani_chain, inputs, turn, history):
+    """
+    Async counterpart of general_page.stream_supervaani, with the same events
+    """
+    started = time.perf_counter()
+    time_to_first_token = None
+    yield sse_event("start", {"conversation_id": turn.conversation_id})
+
+    try:
+        tokens = []
+        final_state = {}
+        async for mode, chunk in supervaani_chain.astream(inputs, stream_mode=["messages", "values"]):
+            if mode == "values":
+                final_state = chunk
+                continue
+
+            token = generated_token(chunk)
+            if token is None:
+                continue
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - started
+                logger.info(f"Time to first token: {time_to_first_token * 1000:.0f} ms")
+            tokens.append(token)
+            yield sse_event("token", {"token": token})
+
+        assistant_response = answer_turn(turn, final_state.get("generation") or "".join(tokens))
+        if not tokens:
+            yield sse_event("token", {"token": assistant_response})
+    except Exception as e:
+        assistant_response = error_message(e)
+        yield sse_event("error", {"supervaani_message": assistant_response})
+    finally:
+        # Save even if the client went away and this task is being cancelled
+        await asyncio.shield(run_db(finish_turn, turn, history))
+
+    yield sse_event("done", {
+        "supervaani_message": assistant_response,
+        "conversation_id": turn.conversation_id,
+        "time_to_first_token_ms": None if time_to_first_token is None else round(time_to_first_token * 1000)
+    })
+
+
+@app.post("/api/{userID}/supervaani")
+async def handle_supervaani(userID: str, request: Request):
+    # Validate request format
+    if request.headers.get("Content-Type") != "application/json":
+        return JSONResponse({"message": "Not a JSON"}, status_code=400)
+
+    # Extract user message and conversation ID
+    content = await request.json()
+    user_input = content.get("user_message", None)
+    conversation_id = content.get("conversation_id", None)
+
+    if user_input is None:
+        return JSONResponse({"message": "Missing user_message"}, status_code=400)
+
+    # Buffer the user message and load the conversation history
+    turn, history, inputs = await run_db(start_turn, clean_id(userID), user_input, conversation_id)
+
+    # Get the shared workflow, compiled on first use
+    supervaani_chain = qa_bot()
+
+    # Stream tokens as server-sent events when the client asks for it
+    if content.get("stream") is True or "text/event-stream" in request.headers.get("Accept", ""):
+        return StreamingResponse(
+            stream_supervaani(supervaani_chain, inputs, turn, history),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    try:
+        result = await supervaani_chain.ainvoke(inputs)
+        assistant_response = answer_turn(turn, result.get("generation", None))
+    except Exception as e:
+        assistant_response = error_message(e)
+
+    # Save the turn; on failure only the user message is stored
+    await run_db(finish_turn, turn, history)
+
+    return {
+        "supervaani_message": assistant_response,
+        "conversation_id": turn.conversation_id
+    }
+
+
+@app.get("/api/{userID}/conversations")
+async def get_conversations(userID: str, limit: int = 10, offset: int = 0):
+    conversations = await run_db(get_user_conversations, clean_id(userID), limit, offset)
+    return {
+        "conversations": conversations,
+        "has_more": len(conversations) == limit
+    }
+
+
+@app.get("/api/{userID}/conversations/{conversationID}")
+async def get_conversation_messages(userID: str, conversationID: str):
+    messages = await run_db(get_conversation_history, clean_id(conversationID))
+    return {"messages": messages}
+
+
+@app.post("/api/{userID}/leave")
+async def handle_leave(userID: str):
+    userID = clean_id(userID)
+    if active_sessions.remove(userID):
+        logger.info(f"User {userID} session ended")
+    return {"supervaani_message": "User session ended"}
+
+
+# Everything else, including uploads and 404s, is served by the Flask app
+app.mount("/", WSGIMiddleware(flask_app))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    host = getenv("SUPERVAANI_API_HOST") if getenv("SUPERVAANI_API_HOST") else "0.0.0.0"
+    port = getenv("SUPERVAANI_API_PORT") if getenv("SUPERVAANI_API_PORT") else 5000
+    uvicorn.run(app, host=host, port=int(port))
@@ -5,41 +5,44 @@ stored in SQLite database.
 """
 from api.v1.views import app_views
 import traceback
-from flask import jsonify, request
+from flask import Response, jsonify, request
 import os
-import asyncio
 import logging
 import json
 import time
-import subprocess
 import re
 from datetime import datetime
-from models.research.main import create_app as qa_bot
+from models.research.main import get_app as qa_bot
 from openpyxl import load_workbook
 
-# Import database configuration
-from database import get_db_connection
+# Import the shared database connection pool
+from database import db_pool, CONVERSATION_HISTORY, USER_CONVERSATIONS
+from idgen import new_id
+from chat_turn import ChatTurn
+from conversation_context import conversation_contexts
+from session_cache import SessionCache
+from ingest_jobs import IngestJobQueue
+from models.ingest_others_data import create_vector_db
+from models.research.retrieval import embeddings, vectorstores
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 UPLOAD_FOLDER = "/home/anupam/SuperVaani/models/others_data"
-USER_TIMEOUT = 30 * 60  # 30 minutes in seconds
+FALLBACK_RESPONSE = "I'm not sure how to respond to that. Could you please rephrase your question?"
+
+# Workflow node whose LLM tokens are streamed back to the client
+STREAMED_NODE = "generate"
 
 # Get conversation history for a user
 def get_conversation_history(conversation_id):
-    conn = get_db_connection()
+    conn = db_pool.acquire()
     cursor = conn.cursor()
     
     try:
-        # Get all messages for the conversation ordered by timestamp
-        cursor.execute('''
-        SELECT id, role, content, timestamp
-        FROM messages
-        WHERE conversation_id = ?
-        ORDER BY timestamp ASC
-        ''', (conversation_id,))
+        # Get all messages for the conversation in the order they were written
+        cursor.execute(CONVERSATION_HISTORY, (conversation_id,))
         
         messages = []
         for row in cursor.fetchall():
@@ -55,71 +58,15 @@ def get_conversation_history(conversation_id):
         logger.error(f"Error retrieving conversation history: {e}")
         return []
     finally:
-        conn.close()
-
-# Save a new message to the database
-def save_message(message_id, conversation_id, role, content):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Insert message
-        cursor.execute('''
-        INSERT INTO messages (id, conversation_id, role, content)
-        VALUES (?, ?, ?, ?)
-        ''', (message_id, conversation_id, role, content))
-        
-        # Update conversation last activity time
-        cursor.execute('''
-        UPDATE conversations
-        SET updated_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-        ''', (conversation_id,))
-        
-        conn.commit()
-        logger.info(f"Message {message_id} saved to conversation {conversation_id}")
-        return True
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Error saving message: {e}")
-        return False
-    finally:
-        conn.close()
-
-# Create a new conversation
-def create_conversation(conversation_id, user_id, title):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute('''
-        INSERT INTO conversations (id, user_id, title)
-        VALUES (?, ?, ?)
-        ''', (conversation_id, user_id, title))
-        
-        conn.commit()
-        logger.info(f"Created new conversation {conversation_id} for user {user_id}")
-        return True
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Error creating conversation: {e}")
-        return False
-    finally:
-        conn.close()
+        db_pool.release(conn)
 
 # Get user's conversations
 def get_user_conversations(user_id, limit=10, offset=0):
-    conn = get_db_connection()
+    conn = db_pool.acquire()
     cursor = conn.cursor()
     
     try:
-        cursor.execute('''
-        SELECT id, title, created_at, updated_at
-        FROM conversations
-        WHERE user_id = ?
-        ORDER BY updated_at DESC
-        LIMIT ? OFFSET ?
-        ''', (user_id, limit, offset))
+        cursor.execute(USER_CONVERSATIONS, (user_id, limit, offset))
         
         conversations = []
         for row in cursor.fetchall():
@@ -135,70 +82,146 @@ def get_user_conversations(user_id, limit=10, offset=0):
         logger.error(f"Error retrieving user conversations: {e}")
         return []
     finally:
-        conn.close()
+        db_pool.release(conn)
 
-# Update user session activity
-def update_user_activity(user_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# Bounded record of active user sessions; the workflow itself is shared.
+# Idle sessions are swept by a background thread started on first use;
+# limits come from the SUPERVAANI_SESSION_* settings in session_cache.py.
+active_sessions = SessionCache()
+
+def run_ingest(progress):
+    """
+    Ingest new uploads and start loading the new index version right away.
+
+    Spreadsheets are parsed on one thread ahead of the embedding. Spawned
+    parse processes would each re-import this server, its models and
+    indexes just to read a few files.
+    """
+    result = create_vector_db(embeddings=embeddings, progress=progress, workers=1, processes=False)
+    if result.get('version'):
+        vectorstores.refresh("others")
+    return result
+
+# Process-wide ingestion queue shared by all request handlers. Uploads are
+# ingested one run at a time with the embedding model the retrievers keep warm.
+ingest_jobs = IngestJobQueue(run_ingest)
+
+@app_views.route("/sessions/metrics", methods=['GET'], strict_slashes=False)
+def get_session_metrics():
+    """
+    Reports hit, miss, eviction and expiration counts of the session cache
+    """
+    return jsonify(active_sessions.stats()), 200
+
+# Buffer the user's message and load the history for a new chat turn
+def start_turn(userID, user_input, conversation_id=None):
+    """
+    Prepare a chat turn.
+
+    Returns:
+        tuple: The ChatTurn, the conversation's cached context and the workflow inputs
+    """
+    # Generate a new conversation ID if not provided
+    is_new_conversation = not conversation_id
+    if is_new_conversation:
+        conversation_id = new_id("conv")
+    
+    # Collect this turn's writes so they are committed together
+    turn = ChatTurn(conversation_id, userID)
+    if is_new_conversation:
+        # Create a new conversation in the database
+        title = user_input[:30] + ('...' if len(user_input) > 30 else '')
+        turn.create_conversation(title)
+    
+    # Buffer the user message until the turn is committed
+    turn.add_message(new_id("msg"), "user", user_input)
+    
+    # Update user activity
+    active_sessions.touch(userID)
+    
+    # Get the token-budgeted history of earlier turns; only generation sees it
+    history = conversation_contexts.get(conversation_id)
+    inputs = {"question": user_input, "history": history.render()}
+    return turn, history, inputs
+
+# Buffer the workflow's answer for a chat turn
+def answer_turn(turn, assistant_response):
+    if not assistant_response:
+        assistant_response = FALLBACK_RESPONSE
+    turn.add_message(new_id("msg"), "assistant", assistant_response)
+    return assistant_response
+
+# Describe a failed request to the user
+def error_message(e):
+    logger.error(f"Error processing request: {e}")
+    error_string = traceback.format_exc()
+    return f"Sorry, something went wrong. Please contact the developer. Error: {error_string}"
+
+# Get the text of a streamed workflow chunk if it is a generated token
+def generated_token(chunk):
+    # Only forward tokens from generation, not from routing or SQL
+    message, metadata = chunk
+    if metadata.get("langgraph_node") != STREAMED_NODE:
+        return None
+    return message.content or None
+
+# Save a chat turn and keep the cached context in step with the database
+def finish_turn(turn, history):
+    if turn.commit():
+        conversation_contexts.extend(turn.conversation_id, history, turn.messages)
+    else:
+        conversation_contexts.discard(turn.conversation_id)
+
+# Format a server-sent event
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Run the workflow and yield the generated answer token by token
+def stream_supervaani(supervaani_chain, inputs, turn, history):
+    """
+    Stream a chat turn as server-sent events.
+
+    Emits a "start" event with the conversation ID, one "token" event per
+    token generated by the RAG chain, and a final "done" event carrying the
+    same fields as the non-streaming response plus the time to first
+    token. The assembled answer is saved once generation has finished; if
+    the client disconnects early only the user message is saved.
+    """
+    started = time.perf_counter()
+    time_to_first_token = None
+    yield sse_event("start", {"conversation_id": turn.conversation_id})
     
     try:
-        cursor.execute('''
-        INSERT INTO user_sessions (user_id, last_activity)
-        VALUES (?, CURRENT_TIMESTAMP)
-        ON CONFLICT(user_id) DO UPDATE SET last_activity = CURRENT_TIMESTAMP
-        ''', (user_id,))
+        tokens = []
+        final_state = {}
+        for mode, chunk in supervaani_chain.stream(inputs, stream_mode=["messages", "values"]):
+            if mode == "values":
+                final_state = chunk
+                continue
+            
+            token = generated_token(chunk)
+            if token is None:
+                continue
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - started
+                logger.info(f"Time to first token: {time_to_first_token * 1000:.0f} ms")
+            tokens.append(token)
+            yield sse_event("token", {"token": token})
         
-        conn.commit()
+        assistant_response = answer_turn(turn, final_state.get("generation") or "".join(tokens))
+        if not tokens:
+            yield sse_event("token", {"token": assistant_response})
     except Exception as e:
-        conn.rollback()
-        logger.error(f"Error updating user activity: {e}")
+        assistant_response = error_message(e)
+        yield sse_event("error", {"supervaani_message": assistant_response})
     finally:
-        conn.close()
-
-# Format conversation history for AI context
-def format_conversation_for_ai(messages):
-    formatted_history = ""
-    for msg in messages:
-        role = "User" if msg['role'] == "user" else "Assistant"
-        formatted_history += f"{role}: {msg['content']}\n\n"
-    return formatted_history
-
-# Dictionary to store user-specific conversation chains
-supervaani_chains = {}
-last_activity = {}
-
-# Cleanup inactive users periodically
-def cleanup_inactive_users():
-    current_time = time.time()
-    users_to_remove = []
-    
-    # Identify inactive users
-    for user_id, last_time in last_activity.items():
-        if current_time - last_time > USER_TIMEOUT:
-            users_to_remove.append(user_id)
+        finish_turn(turn, history)
     
-    # Remove inactive users
-    for user_id in users_to_remove:
-        if user_id in supervaani_chains:
-            del supervaani_chains[user_id]
-        del last_activity[user_id]
-        logger.info(f"Cleaned up inactive user: {user_id}")
-
-# Start a background task for cleanup (in a production app, you'd use a proper scheduler)
-async def periodic_cleanup():
-    while True:
-        cleanup_inactive_users()
-        await asyncio.sleep(300)  # Run every 5 minutes
-
-# Start the cleanup task if not already running
-try:
-    loop = asyncio.get_event_loop()
-    if not loop.is_running():
-        asyncio.ensure_future(periodic_cleanup())
-except RuntimeError:
-    # Handle case where there's no running event loop
-    pass
+    yield sse_event("done", {
+        "supervaani_message": assistant_response,
+        "conversation_id": turn.conversation_id,
+        "time_to_first_token_ms": None if time_to_first_token is None else round(time_to_first_token * 1000)
+    })
 
 @app_views.route("/<userID>/supervaani", methods=['POST'], strict_slashes=False)
 def handle_supervaani(userID):
@@ -218,57 +241,34 @@ def handle_supervaani(userID):
     # Clean userID to prevent injection
     userID = re.sub(r'[^\w@.-]', '_', userID)
     
-    # Generate a new conversation ID if not provided
-    if not conversation_id:
-        conversation_id = f"conv_{int(time.time())}_{userID}"
-        # Create a new conversation in the database
-        title = user_input[:30] + ('...' if len(user_input) > 30 else '')
-        create_conversation(conversation_id, userID, title)
-    
-    # Generate unique message ID
-    user_message_id = f"msg_user_{int(time.time())}"
-    
-    # Save user message to database
-    save_message(user_message_id, conversation_id, "user", user_input)
-    
-    # Update user activity
-    update_user_activity(userID)
-    last_activity[userID] = time.time()
+    # Buffer the user message and load the conversation history
+    turn, history, inputs = start_turn(userID, user_input, conversation_id)
     
-    # Get conversation history for context
-    conversation_history = get_conversation_history(conversation_id)
-    conversation_context = format_conversation_for_ai(conversation_history)
+    # Get the shared workflow, compiled on first use
+    supervaani_chain = qa_bot()
     
-    # Get or create user's conversation chain
-    supervaani_chain = supervaani_chains.get(userID, None)
-    if supervaani_chain is None:
-        logger.info(f"Creating new chain for user {userID}")
-        supervaani_chain = qa_bot()
-        supervaani_chains[userID] = supervaani_chain
+    # Stream tokens as server-sent events when the client asks for it
+    wants_stream = content.get("stream") is True or \
+        "text/event-stream" in request.headers.get("Accept", "")
+    if wants_stream:
+        return Response(
+            stream_supervaani(supervaani_chain, inputs, turn, history),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
     
     try:
-        # Prepare the message with context
-        question_with_context = f"Previous conversation:\n{conversation_context}\n\nCurrent question: {user_input}"
-        
-        # Process the message
-        result = supervaani_chain.invoke({"question": question_with_context})
-        assistant_response = result.get("generation", None)
-        
-        if not assistant_response:
-            assistant_response = "I'm not sure how to respond to that. Could you please rephrase your question?"
-        
-        # Save assistant response to database
-        assistant_message_id = f"msg_assistant_{int(time.time())}"
-        save_message(assistant_message_id, conversation_id, "assistant", assistant_response)
-        
+        result = supervaani_chain.invoke(inputs)
+        assistant_response = answer_turn(turn, result.get("generation", None))
     except Exception as e:
-        logger.error(f"Error processing request: {e}")
-        error_string = traceback.format_exc()
-        assistant_response = f"Sorry, something went wrong. Please contact the developer. Error: {error_string}"
+        assistant_response = error_message(e)
+    
+    # Save the turn; on failure only the user message is stored, as before
+    finish_turn(turn, history)
     
     return jsonify({
         "supervaani_message": assistant_response,
-        "conversation_id": conversation_id
+        "conversation_id": turn.conversation_id
     }), 200
 
 @app_views.route("/<string:userID>/conversations", methods=['GET'], strict_slashes=False)
@@ -309,10 +309,7 @@ def handle_leave(userID):
     # Clean userID to prevent injection
     userID = re.sub(r'[^\w@.-]', '_', userID)
     
-    if userID in supervaani_chains:
-        del supervaani_chains[userID]
-        if userID in last_activity:
-            del last_activity[userID]
+    if active_sessions.remove(userID):
         logger.info(f"User {userID} session ended")
     
     return jsonify({"supervaani_message": "User session ended"}), 200
@@ -360,53 +357,49 @@ def upload_file():
         safe_filename = re.sub(r'[^\w.-]', '_', file.filename)
         filename = f"{safe_filename}"
         file_path = os.path.join(user_dir, filename)
-        
+        # Written under a hidden temporary name, which ingestion skips, and
+        # renamed into place once complete and valid, so a concurrent
+        # ingestion run never reads a half-written or invalid file
+        temp_path = os.path.join(user_dir, f".upload-{new_id()}-{filename}")
 
-        file.save(file_path)
+        file.save(temp_path)
         try:
             # Validate the uploaded file
-            workbook = load_workbook(file_path)
+            workbook = load_workbook(temp_path)
             sheet = workbook.active  # Get the first sheet
-            headers = [cell.value.strip().lower() for cell in sheet[1] if cell.value]  # Read the first row
+            headers = [str(cell.value).strip().lower() for cell in sheet[1] if cell.value]  # Read the first row
+            workbook.close()
 
             # Ensure the required columns are present
             if not any(header in headers for header in ['questions', 'question']) or \
                not any(header in headers for header in ['answers', 'answer']):
+                os.remove(temp_path)
                 return jsonify({"error": "Invalid file format. The first row must contain 'Questions'/'Question' and 'Answers'/'Answer' columns."}), 400
+            os.replace(temp_path, file_path)
         except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
             return jsonify({"error": f"Failed to process the file: {str(e)}"}), 400
 
-        try:
-            # Run the ingestion script
-            script_path = "/home/anupam/SuperVaani/models/ingest_others_data.py"
-            
-            # Run script in background (non-blocking)
-            # Option 1: Run and wait for completion
-            result = subprocess.run(
-                ['python3', script_path],
-                cwd='/home/anupam/SuperVaani/models',
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout
-            )
-            
-            if result.returncode != 0:
-                return jsonify({
-                    "error": "File uploaded but processing failed",
-                    "details": result.stderr
-                }), 500
-            
-            return jsonify({
-                "message": "File uploaded and processed successfully",
-                "filename": file.filename,
-                "user_id": user_id,
-                "script_output": result.stdout
-            }), 200
-            
-        except subprocess.TimeoutExpired:
-            return jsonify({
-                "error": "File uploaded but processing timed out"
-            }), 500
+        # Ingest in the background with the warm embedding model; clients poll the job
+        job = ingest_jobs.submit(filename)
+        return jsonify({
+            "message": "File uploaded, ingestion queued",
+            "filename": file.filename,
+            "user_id": user_id,
+            "job_id": job.id,
+            "status_url": f"/api/ingest_jobs/{job.id}"
+        }), 202
 
-    
     return jsonify({"error": "Invalid file type"}), 400
+
+
+@app_views.route('/ingest_jobs/<job_id>', methods=['GET'])
+def get_ingest_job(job_id):
+    """
+    Reports the state, progress, chunk counts and timings of an ingestion job
+    """
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown ingestion job"}), 404
+    return jsonify(job.to_dict()), 200
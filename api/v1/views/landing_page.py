@@ -4,6 +4,9 @@ Deals with the RESTful API action(s) of the landing page
 """
 from api.v1.views import app_views
 from flask import jsonify, request
+from models.research.retrieval import vectorstores, embeddings, faculty_index
+from models.research.answer_cache import answer_cache
+from models.research.sql_chain import sql_engine
 
 
 @app_views.route("/home", strict_slashes=False)
@@ -12,3 +15,30 @@ def landing_page():
     Fetches the necessary data to render the landing page
     """
     return jsonify({"SuperVaani": "Plaksha"}), 200
+
+
+@app_views.route("/ready", strict_slashes=False)
+def readiness():
+    """
+    Reports the load state of each vectorstore; 503 until all are loaded
+    """
+    status = {
+        "ready": vectorstores.ready(),
+        "embedding_model_loaded": vectorstores.embeddings_ready(),
+        "indexes": vectorstores.status()
+    }
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@app_views.route("/cache/metrics", strict_slashes=False)
+def cache_metrics():
+    """
+    Reports hit rates of the retrieval, answer and SQL caches and SQL repair attempts
+    """
+    return jsonify({
+        "query_embeddings": embeddings.stats(),
+        "answers": answer_cache.stats(),
+        "sql": sql_engine.cache.stats(),
+        "sql_attempts": sql_engine.attempts.stats(),
+        "faculty_index": faculty_index.stats()
+    }), 200
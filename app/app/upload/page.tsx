@@ -11,6 +11,25 @@ import {
 } from "react-icons/hi";
 import Image from "next/image";
 
+// How often the ingestion job is polled after an upload
+const JOB_POLL_INTERVAL_MS = 2000;
+
+type IngestJob = {
+  job_id: string;
+  state: "queued" | "running" | "succeeded" | "failed";
+  progress: { stage: string | null; done: number; total: number };
+  result: { chunks_added?: number; files_changed?: number } | null;
+  error: string | null;
+};
+
+const describeJob = (job: IngestJob) => {
+  if (job.state === "queued") return "File uploaded, waiting to be indexed...";
+  const { stage, done, total } = job.progress;
+  return total
+    ? `Indexing: ${stage || "working"} (${done}/${total})`
+    : `Indexing: ${stage || "starting"}...`;
+};
+
 const RollingLoader = () => {
   return (
     <div className="flex justify-center items-center">
@@ -25,7 +44,7 @@ export default function UploadPage() {
   const [file, setFile] = useState<File | null>(null);
   const [uploading, setUploading] = useState(false);
   const [uploadStatus, setUploadStatus] = useState<{
-    type: "success" | "error" | null;
+    type: "success" | "error" | "info" | null;
     message: string;
   }>({ type: null, message: "" });
   const [dragActive, setDragActive] = useState(false);
@@ -101,6 +120,37 @@ export default function UploadPage() {
     }
   };
 
+const pollIngestJob = async (statusUrl: string) => {
+  // Poll until the job reaches a terminal state and report its outcome
+  while (true) {
+    const response = await fetch(statusUrl);
+    const job: IngestJob = await response.json();
+    if (!response.ok) {
+      throw new Error((job as any).error || "Could not read the indexing status");
+    }
+    if (job.state === "succeeded") {
+      const added = job.result?.chunks_added;
+      setUploadStatus({
+        type: "success",
+        message:
+          added === undefined
+            ? "File uploaded and indexed successfully!"
+            : `File uploaded and indexed successfully! ${added} new entries added.`,
+      });
+      return;
+    }
+    if (job.state === "failed") {
+      setUploadStatus({
+        type: "error",
+        message: `File uploaded, but indexing failed: ${job.error || "unknown error"}`,
+      });
+      return;
+    }
+    setUploadStatus({ type: "info", message: describeJob(job) });
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
+
 const handleUpload = async () => {
   if (!file || !session?.user?.email) return;
 
@@ -121,13 +171,12 @@ const handleUpload = async () => {
     const data = await response.json();
 
     if (response.ok) {
-      setUploadStatus({
-        type: "success",
-        message: "File uploaded successfully!",
-      });
       setFile(null);
       const fileInput = document.getElementById("file-input") as HTMLInputElement;
       if (fileInput) fileInput.value = "";
+      // The file is indexed in the background; show the job's real outcome
+      setUploadStatus({ type: "info", message: "File uploaded, waiting to be indexed..." });
+      await pollIngestJob(data.status_url || `/api/ingest_jobs/${data.job_id}`);
     } else {
       setUploadStatus({
         type: "error",
@@ -291,11 +340,15 @@ const handleUpload = async () => {
                 <div
                   className={`mt-6 p-4 rounded-lg flex items-center gap-3 ${uploadStatus.type === "success"
                       ? "bg-green-900/20 border border-green-800"
-                      : "bg-red-900/20 border border-red-800"
+                      : uploadStatus.type === "info"
+                        ? "bg-blue-900/20 border border-blue-800"
+                        : "bg-red-900/20 border border-red-800"
                     }`}
                 >
                   {uploadStatus.type === "success" ? (
                     <HiCheckCircle className="w-6 h-6 text-green-400" />
+                  ) : uploadStatus.type === "info" ? (
+                    <div className="w-6 h-6 rounded-full border-2 border-blue-400 animate-spin border-t-transparent"></div>
                   ) : (
                     <HiXCircle className="w-6 h-6 text-red-400" />
                   )}
@@ -303,7 +356,9 @@ const handleUpload = async () => {
                     className={
                       uploadStatus.type === "success"
                         ? "text-green-300"
-                        : "text-red-300"
+                        : uploadStatus.type === "info"
+                          ? "text-blue-300"
+                          : "text-red-300"
                     }
                   >
                     {uploadStatus.message}
@@ -0,0 +1,86 @@
+# chat_turn.py
+import logging
+
+from database import db_pool, INSERT_MESSAGE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INSERT_CONVERSATION = '''
+INSERT INTO conversations (id, user_id, title)
+VALUES (?, ?, ?)
+'''
+
+TOUCH_CONVERSATION = '''
+UPDATE conversations
+SET updated_at = CURRENT_TIMESTAMP
+WHERE id = ?
+'''
+
+TOUCH_USER_SESSION = '''
+INSERT INTO user_sessions (user_id, last_activity)
+VALUES (?, CURRENT_TIMESTAMP)
+ON CONFLICT(user_id) DO UPDATE SET last_activity = CURRENT_TIMESTAMP
+'''
+
+class ChatTurn:
+    """
+    Unit of work for the database writes of a single chat turn.
+
+    Creating the conversation, saving the user and assistant messages and
+    touching the user's activity are buffered in memory and written by
+    commit() in one transaction, so a turn costs a single fsync instead of
+    one per write.
+    """
+
+    def __init__(self, conversation_id, user_id, pool=db_pool):
+        self.conversation_id = conversation_id
+        self.user_id = user_id
+        self.title = None
+        self.messages = []
+        self._pool = pool
+
+    def create_conversation(self, title):
+        """
+        Create the conversation when the turn is committed.
+        """
+        self.title = title
+
+    def add_message(self, message_id, role, content):
+        """
+        Buffer a message, keeping the order in which messages were added.
+        """
+        self.messages.append({
+            'id': message_id,
+            'role': role,
+            'content': content,
+            'timestamp': None
+        })
+
+    def commit(self):
+        """
+        Write everything buffered for this turn in a single transaction.
+
+        Returns:
+            bool: True if the turn was saved, False if it was rolled back
+        """
+        try:
+            with self._pool.transaction() as conn:
+                if self.title is not None:
+                    conn.execute(INSERT_CONVERSATION, (self.conversation_id, self.user_id, self.title))
+
+                conn.executemany(INSERT_MESSAGE, [
+                    (msg['id'], self.conversation_id, msg['role'], msg['content'], self.conversation_id)
+                    for msg in self.messages
+                ])
+
+                # Update conversation last activity time once per turn
+                conn.execute(TOUCH_CONVERSATION, (self.conversation_id,))
+                conn.execute(TOUCH_USER_SESSION, (self.user_id,))
+
+            logger.info(f"Saved {len(self.messages)} message(s) to conversation {self.conversation_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving chat turn: {e}")
+            return False
@@ -0,0 +1,224 @@
+# conversation_context.py
+import os
+import threading
+from collections import OrderedDict, deque
+
+from database import db_pool
+
+# Context limits, overridable through the environment
+CONTEXT_TOKEN_BUDGET = int(os.environ.get('SUPERVAANI_CONTEXT_TOKEN_BUDGET', 2048))
+CONTEXT_SUMMARY_TOKENS = int(os.environ.get('SUPERVAANI_CONTEXT_SUMMARY_TOKENS', 256))
+CONTEXT_TAIL_MESSAGES = int(os.environ.get('SUPERVAANI_CONTEXT_TAIL_MESSAGES', 20))
+CONTEXT_CACHE_SIZE = int(os.environ.get('SUPERVAANI_CONTEXT_CACHE_SIZE', 1024))
+
+# Rough characters per token for llama-style tokenizers on English text
+CHARS_PER_TOKEN = 4
+
+# Longest excerpt of an earlier question kept in the summary
+SUMMARY_TOPIC_CHARS = 120
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a piece of text.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def format_message(message):
+    """
+    Format a single message the way the model sees it in the history.
+    """
+    role = "User" if message['role'] == "user" else "Assistant"
+    return f"{role}: {message['content']}\n\n"
+
+class ConversationContext:
+    """
+    Token-budgeted view of one conversation.
+
+    The most recent messages are kept verbatim in a rolling window. When
+    the window goes over its budget the oldest messages are folded into a
+    running summary of the questions asked so far, which has its own,
+    smaller budget. Instances are treated as immutable once shared;
+    extended() returns an updated copy.
+    """
+
+    def __init__(self, token_budget=CONTEXT_TOKEN_BUDGET, summary_tokens=CONTEXT_SUMMARY_TOKENS):
+        self.token_budget = token_budget
+        self.summary_tokens = min(summary_tokens, token_budget // 2)
+        self.last_seq = 0
+        self._window = deque()
+        self._window_tokens = 0
+        self._topics = deque()
+        self._topic_tokens = 0
+        self._formatted = None
+
+    def copy(self):
+        clone = ConversationContext(self.token_budget, self.summary_tokens)
+        clone.last_seq = self.last_seq
+        clone._window = deque(self._window)
+        clone._window_tokens = self._window_tokens
+        clone._topics = deque(self._topics)
+        clone._topic_tokens = self._topic_tokens
+        clone._formatted = self._formatted
+        return clone
+
+    def append(self, message):
+        """
+        Add a message to the end of the window, folding old ones into the summary.
+        """
+        window_budget = self.token_budget - self.summary_tokens
+        text = format_message(message)
+        if estimate_tokens(text) > window_budget:
+            text = text[:window_budget * CHARS_PER_TOKEN].rstrip() + " ...\n\n"
+        tokens = estimate_tokens(text)
+
+        self._window.append((message, text, tokens))
+        self._window_tokens += tokens
+        while self._window_tokens > window_budget and len(self._window) > 1:
+            old_message, _, old_tokens = self._window.popleft()
+            self._window_tokens -= old_tokens
+            self._fold(old_message)
+        self._formatted = None
+
+    def _fold(self, message):
+        # Only the user's questions are kept once a message leaves the window
+        if message['role'] != "user":
+            return
+        topic = " ".join(message['content'].split())
+        if len(topic) > SUMMARY_TOPIC_CHARS:
+            topic = topic[:SUMMARY_TOPIC_CHARS].rstrip() + "..."
+        tokens = estimate_tokens(topic) + 1
+        self._topics.append((topic, tokens))
+        self._topic_tokens += tokens
+        while self._topic_tokens > self.summary_tokens and self._topics:
+            _, old_tokens = self._topics.popleft()
+            self._topic_tokens -= old_tokens
+
+    def extended(self, messages, last_seq=None):
+        """
+        Get a copy of this context with messages appended.
+
+        Args:
+            messages (list): Messages in order, as dicts with 'role' and 'content'
+            last_seq (int): Sequence number of the last message, defaults to counting on
+
+        Returns:
+            ConversationContext: The updated copy
+        """
+        clone = self.copy()
+        for message in messages:
+            clone.append(message)
+        clone.last_seq = last_seq if last_seq is not None else self.last_seq + len(messages)
+        return clone
+
+    def render(self):
+        """
+        Format the context for the model.
+
+        Returns:
+            str: The summary followed by the recent messages
+        """
+        if self._formatted is None:
+            parts = []
+            if self._topics:
+                topics = "; ".join(topic for topic, _ in self._topics)
+                parts.append(f"Summary: earlier in this conversation the user asked about: {topics}\n\n")
+            parts.extend(text for _, text, _ in self._window)
+            self._formatted = "".join(parts)
+        return self._formatted
+
+    @property
+    def tokens(self):
+        return self._topic_tokens + self._window_tokens
+
+def get_latest_seq(conversation_id):
+    """
+    Get the sequence number of the newest message in a conversation.
+    """
+    with db_pool.connection() as conn:
+        row = conn.execute('''
+        SELECT MAX(seq) FROM messages WHERE conversation_id = ?
+        ''', (conversation_id,)).fetchone()
+    return row[0] or 0
+
+def get_recent_messages(conversation_id, limit=CONTEXT_TAIL_MESSAGES):
+    """
+    Get the last messages of a conversation, oldest first.
+    """
+    with db_pool.connection() as conn:
+        rows = conn.execute('''
+        SELECT role, content, seq
+        FROM messages
+        WHERE conversation_id = ?
+        ORDER BY seq DESC
+        LIMIT ?
+        ''', (conversation_id, limit)).fetchall()
+    return [{'role': row['role'], 'content': row['content'], 'seq': row['seq']}
+            for row in reversed(rows)]
+
+class ContextCache:
+    """
+    Thread-safe LRU cache of conversation contexts.
+
+    A cached context is reused as long as the conversation has no newer
+    messages in the database, which costs one index lookup per turn.
+    Otherwise only the tail of the history is read back.
+    """
+
+    def __init__(self, size=CONTEXT_CACHE_SIZE, tail=CONTEXT_TAIL_MESSAGES,
+                 token_budget=CONTEXT_TOKEN_BUDGET, summary_tokens=CONTEXT_SUMMARY_TOKENS):
+        self.size = size
+        self.tail = tail
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id):
+        """
+        Get the context of a conversation as currently stored in the database.
+        """
+        latest_seq = get_latest_seq(conversation_id)
+        with self._lock:
+            context = self._contexts.get(conversation_id)
+            if context is not None and context.last_seq == latest_seq:
+                self._contexts.move_to_end(conversation_id)
+                return context
+
+        context = ConversationContext(self.token_budget, self.summary_tokens)
+        messages = get_recent_messages(conversation_id, self.tail) if latest_seq else []
+        if messages:
+            context = context.extended(messages, messages[-1]['seq'])
+        self._store(conversation_id, context)
+        return context
+
+    def extend(self, conversation_id, base, messages):
+        """
+        Record messages committed on top of a context returned by get().
+
+        If another request changed the conversation in the meantime, the
+        cached entry is dropped and rebuilt on the next get().
+        """
+        context = base.extended(messages)
+        with self._lock:
+            if self._contexts.get(conversation_id, base) is not base:
+                del self._contexts[conversation_id]
+                return
+            self._put(conversation_id, context)
+
+    def discard(self, conversation_id):
+        with self._lock:
+            self._contexts.pop(conversation_id, None)
+
+    def _store(self, conversation_id, context):
+        with self._lock:
+            self._put(conversation_id, context)
+
+    def _put(self, conversation_id, context):
+        # Caller holds the lock
+        self._contexts[conversation_id] = context
+        self._contexts.move_to_end(conversation_id)
+        while len(self._contexts) > self.size:
+            self._contexts.popitem(last=False)
+
+# Process-wide cache shared by all request handlers
+conversation_contexts = ContextCache()
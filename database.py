@@ -1,7 +1,14 @@
 # db_config.py
 import os
+import time
+import atexit
+import asyncio
 import sqlite3
 import logging
+import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,20 +27,39 @@ DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'supervaani.db')
 # Get database path from environment variable or use default
 DB_PATH = os.environ.get('SUPERVAANI_DB_PATH', DEFAULT_DB_PATH)
 
+# Connection pool and SQLite tuning, overridable through the environment
+DB_POOL_SIZE = int(os.environ.get('SUPERVAANI_DB_POOL_SIZE', 8))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get('SUPERVAANI_DB_BUSY_TIMEOUT_MS', 5000))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('SUPERVAANI_DB_STATEMENT_CACHE_SIZE', 256))
+
 def get_db_connection():
     """
     Get a connection to the SQLite database.
     
+    The connection runs in WAL mode with synchronous=NORMAL and a busy
+    timeout, so readers never block the writer and concurrent writers wait
+    for the lock instead of failing with "database is locked".
+    
     Returns:
         sqlite3.Connection: A connection to the database
     """
     try:
-        # Connect to the database
-        conn = sqlite3.connect(DB_PATH)
+        # Connect to the database; prepared statements are cached per connection
+        conn = sqlite3.connect(
+            DB_PATH,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+            check_same_thread=False
+        )
         
         # Enable foreign key constraints
         conn.execute("PRAGMA foreign_keys = ON")
         
+        # Write-ahead logging with relaxed fsync for better write throughput
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        
         # Configure row factory to enable column access by name
         conn.row_factory = sqlite3.Row
         
@@ -42,16 +68,149 @@ def get_db_connection():
         logger.error(f"Database connection error: {e}")
         raise
 
-def init_db():
+class ConnectionPool:
     """
-    Initialize the database with required tables.
+    Thread-safe pool of SQLite connections.
+    
+    Connections are opened lazily up to ``size`` and handed out to one
+    thread at a time. Callers that find the pool exhausted block until a
+    connection is released or a broken one is discarded, freeing a slot.
     """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+
+    def __init__(self, size=DB_POOL_SIZE, connect=get_db_connection):
+        self.size = size
+        self._connect = connect
+        self._idle = []
+        self._available = threading.Condition(threading.Lock())
+        self._opened = 0
+
+    def acquire(self, timeout=None):
+        """
+        Borrow a connection from the pool.
+        
+        Args:
+            timeout (float): Seconds to wait for a free connection, or None to wait forever
         
-        # Create conversations table
-        cursor.execute('''
+        Returns:
+            sqlite3.Connection: A configured connection
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._available:
+            while True:
+                if self._idle:
+                    # Most recently used first, its pages are still warm
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    # Open a new connection if we are still below the pool size
+                    self._opened += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise sqlite3.OperationalError("Timed out waiting for a database connection")
+                self._available.wait(remaining)
+        
+        try:
+            return self._connect()
+        except Exception:
+            self._free_slot()
+            raise
+
+    def release(self, conn):
+        """
+        Return a borrowed connection to the pool.
+        
+        Any transaction left open by the borrower is rolled back. Connections
+        that can no longer be used are closed and dropped from the pool.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.error(f"Discarding broken database connection: {e}")
+            self._discard(conn)
+            return
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._free_slot()
+
+    def _free_slot(self):
+        # A waiter may now open a connection in the freed slot
+        with self._available:
+            self._opened -= 1
+            self._available.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Borrow a connection for the duration of a ``with`` block.
+        """
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self, timeout=None):
+        """
+        Run a ``with`` block as a single write transaction.
+
+        The write lock is taken up front with BEGIN IMMEDIATE, so the block
+        never fails half way through on a lock upgrade. The transaction is
+        committed when the block exits normally and rolled back otherwise.
+        """
+        with self.connection(timeout) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def close_all(self):
+        """
+        Close every idle connection held by the pool; runs at interpreter exit.
+        """
+        with self._available:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+# Process-wide pool shared by all request handlers
+db_pool = ConnectionPool()
+atexit.register(db_pool.close_all)
+
+# Worker threads for database calls made from async code, one per connection
+db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="supervaani-db")
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run a blocking database function from async code.
+    
+    The call runs on a dedicated thread pool sized to the connection pool,
+    so it never blocks the event loop and at most one call waits for each
+    pooled connection.
+    
+    Returns:
+        The return value of func
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
+
+# Ordered schema migrations as (version, description, statements). The
+# applied version is stored in the database header via PRAGMA user_version,
+# so existing databases are upgraded in place by applying the missing steps.
+MIGRATIONS = [
+    (1, "create conversations, messages and user_sessions tables", [
+        '''
         CREATE TABLE IF NOT EXISTS conversations (
             id TEXT PRIMARY KEY,
             user_id TEXT NOT NULL,
@@ -59,10 +218,8 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-        ''')
-        
-        # Create messages table
-        cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS messages (
             id TEXT PRIMARY KEY,
             conversation_id TEXT NOT NULL,
@@ -71,18 +228,143 @@ def init_db():
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (conversation_id) REFERENCES conversations(id)
         )
-        ''')
-        
-        # Create user_sessions table
-        cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS user_sessions (
             user_id TEXT PRIMARY KEY,
             last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-        ''')
-        
+        ''',
+    ]),
+    (2, "index conversation history and per-user conversation lists", [
+        # History is read per conversation in timestamp order
+        '''
+        CREATE INDEX IF NOT EXISTS idx_messages_conversation_timestamp
+        ON messages (conversation_id, timestamp)
+        ''',
+        # Covers the conversation list query, so it never touches the table
+        '''
+        CREATE INDEX IF NOT EXISTS idx_conversations_user_updated
+        ON conversations (user_id, updated_at, id, title, created_at)
+        ''',
+    ]),
+    (3, "order messages by a per-conversation sequence number", [
+        'ALTER TABLE messages ADD COLUMN seq INTEGER',
+        # Number existing messages in their current (timestamp, rowid) order
+        'CREATE TEMP TABLE message_seq (rid INTEGER PRIMARY KEY, seq INTEGER NOT NULL)',
+        '''
+        INSERT INTO message_seq (rid, seq)
+        SELECT rowid, ROW_NUMBER() OVER (
+            PARTITION BY conversation_id ORDER BY timestamp, rowid
+        )
+        FROM messages
+        ''',
+        '''
+        UPDATE messages
+        SET seq = (SELECT seq FROM message_seq WHERE rid = messages.rowid)
+        ''',
+        'DROP TABLE message_seq',
+        # History is read per conversation in sequence order
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_conversation_seq
+        ON messages (conversation_id, seq)
+        ''',
+        'DROP INDEX IF EXISTS idx_messages_conversation_timestamp',
+    ]),
+    (4, "record ingestion jobs so every server process can report them", [
+        '''
+        CREATE TABLE IF NOT EXISTS ingest_jobs (
+            id TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            files TEXT NOT NULL,
+            stage TEXT,
+            done INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+        ''',
+    ]),
+]
+
+# Reads served by the indexes above; get_conversation_history and
+# get_user_conversations run them, and the query plan checks explain them
+CONVERSATION_HISTORY = '''
+SELECT id, role, content, timestamp
+FROM messages
+WHERE conversation_id = ?
+ORDER BY seq ASC
+'''
+
+USER_CONVERSATIONS = '''
+SELECT id, title, created_at, updated_at
+FROM conversations
+WHERE user_id = ?
+ORDER BY updated_at DESC
+LIMIT ? OFFSET ?
+'''
+
+# Insert a message as the next one in its conversation. Writers hold the
+# database write lock, so the MAX(seq) lookup cannot race another insert.
+INSERT_MESSAGE = '''
+INSERT INTO messages (id, conversation_id, role, content, seq)
+SELECT ?, ?, ?, ?, COALESCE(MAX(seq), 0) + 1
+FROM messages
+WHERE conversation_id = ?
+'''
+
+def get_schema_version(conn):
+    """
+    Get the schema version recorded in the database.
+    
+    Returns:
+        int: The last applied migration version, 0 for a new database
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """
+    Apply all pending migrations in a single transaction.
+    
+    The write lock is taken up front, so when several processes start at
+    the same time only one of them applies the migrations and the others
+    see the upgraded version.
+    
+    Args:
+        conn (sqlite3.Connection): Connection to the database to upgrade
+    
+    Returns:
+        int: The schema version after migrating
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = get_schema_version(conn)
+        for target, description, statements in MIGRATIONS:
+            if target <= version:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target}")
+            version = target
+            logger.info(f"Applied schema migration {target}: {description}")
         conn.commit()
-        logger.info(f"Database initialized successfully at {DB_PATH}")
+        return version
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def init_db():
+    """
+    Initialize the database with required tables.
+    """
+    conn = None
+    try:
+        conn = get_db_connection()
+        version = migrate(conn)
+        logger.info(f"Database initialized successfully at {DB_PATH} (schema version {version})")
     except sqlite3.Error as e:
         logger.error(f"Database initialization error: {e}")
         raise
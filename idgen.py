@@ -0,0 +1,70 @@
+# idgen.py
+import os
+import time
+import threading
+
+# Crockford base32, the ULID alphabet; sorts the same as the numeric value
+ENCODING = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ENCODED_LENGTH = 26
+
+# Bit layout of an identifier, most significant first
+TIMESTAMP_BITS = 48   # Unix time in milliseconds
+FRACTION_BITS = 12    # Sub-millisecond fraction, ~244 ns resolution
+RANDOM_BITS = 68      # Random tail, keeps concurrent processes apart
+RANDOM_MASK = (1 << RANDOM_BITS) - 1
+
+def encode(value):
+    """
+    Encode a 128-bit integer as a 26 character Crockford base32 string.
+    """
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        chars.append(ENCODING[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+class IdGenerator:
+    """
+    Thread-safe generator of time-ordered, ULID-style identifiers.
+
+    Each identifier packs the current time with sub-millisecond resolution
+    and 68 random bits. Within a process identifiers are strictly
+    increasing even when the clock stalls or steps back; across processes
+    the random bits keep them unique and they sort by creation time.
+    """
+
+    def __init__(self, clock=time.time_ns):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def _next_value(self):
+        now_ns = self._clock()
+        millis, nanos = divmod(now_ns, 1_000_000)
+        fraction = nanos * (1 << FRACTION_BITS) // 1_000_000
+        random_tail = int.from_bytes(os.urandom(9), "big") & RANDOM_MASK
+        value = (((millis << FRACTION_BITS) | fraction) << RANDOM_BITS) | random_tail
+
+        with self._lock:
+            # Never go backwards, whatever the clock does
+            if value <= self._last:
+                value = self._last + 1
+            self._last = value
+        return value
+
+    def new_id(self, prefix=None):
+        """
+        Generate a new identifier.
+
+        Args:
+            prefix (str): Optional prefix joined to the identifier with "_"
+
+        Returns:
+            str: The identifier, e.g. "msg_01JA3Z6Q4W9N0K7YV2C5D8E1FG"
+        """
+        identifier = encode(self._next_value())
+        return f"{prefix}_{identifier}" if prefix else identifier
+
+# Process-wide generator shared by all request handlers
+id_generator = IdGenerator()
+new_id = id_generator.new_id
@@ -0,0 +1,202 @@
+# ingest_jobs.py
+import os
+import json
+import time
+import queue
+import sqlite3
+import logging
+import threading
+import traceback
+
+from idgen import new_id
+from database import db_pool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for status polling, overridable through the environment
+INGEST_JOB_HISTORY = int(os.environ.get('SUPERVAANI_INGEST_JOB_HISTORY', 100))
+
+# Job states reported by IngestJob.to_dict()
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+class IngestJob:
+    """
+    One ingestion run and the uploads it covers.
+    """
+
+    def __init__(self, files):
+        self.id = new_id("job")
+        self.files = list(files)
+        self.state = QUEUED
+        self.stage = None
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Rebuild a job from its row in the ingest_jobs table.
+        """
+        job = cls.__new__(cls)
+        job.id = row['id']
+        job.files = json.loads(row['files'])
+        job.state = row['state']
+        job.stage = row['stage']
+        job.done = row['done']
+        job.total = row['total']
+        job.result = None if row['result'] is None else json.loads(row['result'])
+        job.error = row['error']
+        job.created_at = row['created_at']
+        job.started_at = row['started_at']
+        job.finished_at = row['finished_at']
+        return job
+
+    def to_row(self):
+        return (self.id, self.state, json.dumps(self.files), self.stage, self.done, self.total,
+                None if self.result is None else json.dumps(self.result), self.error,
+                self.created_at, self.started_at, self.finished_at)
+
+    def to_dict(self):
+        """
+        Get the job's status for the API.
+
+        Returns:
+            dict: State, progress, result and timings
+        """
+        now = time.time()
+        return {
+            'job_id': self.id,
+            'state': self.state,
+            'files': list(self.files),
+            'progress': {'stage': self.stage, 'done': self.done, 'total': self.total},
+            'result': self.result,
+            'error': self.error,
+            'queued_seconds': round((self.started_at or now) - self.created_at, 3),
+            'run_seconds': None if self.started_at is None else round((self.finished_at or now) - self.started_at, 3)
+        }
+
+SAVE_JOB = '''
+INSERT OR REPLACE INTO ingest_jobs
+    (id, state, files, stage, done, total, result, error, created_at, started_at, finished_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Keeps unfinished jobs and the newest finished ones
+TRIM_JOBS = '''
+DELETE FROM ingest_jobs
+WHERE state IN (?, ?) AND id NOT IN (
+    SELECT id FROM ingest_jobs WHERE state IN (?, ?) ORDER BY created_at DESC LIMIT ?
+)
+'''
+
+class IngestJobQueue:
+    """
+    Queue of ingestion jobs run by a single worker thread.
+
+    Jobs run one at a time, so two rebuilds of the index never race. An
+    ingestion run picks up every file in the data directory, so uploads
+    that arrive while a job is still queued join that job instead of
+    queueing another run. The worker is started on first use, so it also
+    runs in worker processes forked after import.
+
+    Job state is written to the ingest_jobs table on every change, so a
+    status poll answered by any server process sees the job, not only the
+    process that queued it.
+    """
+
+    def __init__(self, run, history=INGEST_JOB_HISTORY, pool=db_pool):
+        self._run = run
+        self.history = history
+        self._pool = pool
+        self._pending = queue.Queue()
+        self._queued = None
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, filename):
+        """
+        Queue ingestion of an uploaded file.
+
+        Returns:
+            IngestJob: The job that will ingest it, possibly shared with earlier uploads
+        """
+        self._ensure_worker()
+        with self._lock:
+            job = self._queued
+            if job is not None:
+                if filename not in job.files:
+                    job.files.append(filename)
+                    self._save(job)
+                return job
+            job = IngestJob([filename])
+            self._queued = job
+            self._save(job)
+        self._pending.put(job)
+        return job
+
+    def get(self, job_id):
+        """
+        Get a job by ID.
+
+        Returns:
+            IngestJob: The job, or None if it is unknown or was dropped from history
+        """
+        try:
+            with self._pool.connection() as conn:
+                row = conn.execute("SELECT * FROM ingest_jobs WHERE id = ?", (job_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read ingest job {job_id}: {e}")
+            return None
+        return None if row is None else IngestJob.from_row(row)
+
+    def _save(self, job):
+        # A status write that fails must never stop the ingestion itself
+        try:
+            with self._pool.transaction() as conn:
+                conn.execute(SAVE_JOB, job.to_row())
+                if job.state in (SUCCEEDED, FAILED):
+                    conn.execute(TRIM_JOBS, (SUCCEEDED, FAILED, SUCCEEDED, FAILED, self.history))
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save ingest job {job.id}: {e}")
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, name="ingest-worker", daemon=True)
+                self._worker.start()
+
+    def _work(self):
+        while True:
+            job = self._pending.get()
+            with self._lock:
+                if self._queued is job:
+                    self._queued = None
+                job.state = RUNNING
+                job.started_at = time.time()
+                self._save(job)
+
+            def progress(stage, done, total):
+                job.stage, job.done, job.total = stage, done, total
+                self._save(job)
+
+            try:
+                job.result = self._run(progress)
+                job.state = SUCCEEDED
+                logger.info(f"Ingest job {job.id} finished for {', '.join(job.files)}")
+            except Exception as e:
+                job.error = str(e)
+                job.state = FAILED
+                logger.error(f"Ingest job {job.id} failed: {e}\n{traceback.format_exc()}")
+            finally:
+                job.finished_at = time.time()
+                self._save(job)
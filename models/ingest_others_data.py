@@ -1,37 +1,464 @@
 from langchain_community.vectorstores import FAISS
 from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter 
+from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import UnstructuredExcelLoader
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 from langchain_community.utilities.sql_database import SQLDatabase
+from openpyxl import load_workbook
 import os
+import sys
+import json
+import time
+import fcntl
+import logging
+import shutil
+import hashlib
+import tempfile
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 DATA_PATH = '/home/anupam/SuperVaani/models/others_data/'
 DB_FAISS_PATH = '/home/anupam/SuperVaani/models/vectorstore_others/db_faiss'
 
+# Content hash and chunk IDs of every ingested file, saved next to the index
+MANIFEST_FILE = 'manifest.json'
 
-# Create vector database
-def create_vector_db():
-    loader = DirectoryLoader(DATA_PATH,
-                             glob='*',
-                             loader_cls=UnstructuredExcelLoader)
+# Lock file, next to the index directory, held while the index is updated
+LOCK_FILE = '.ingest.lock'
 
-    documents = loader.load()
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000,
-                                                   chunk_overlap=100)
+# Directory, next to DB_FAISS_PATH, holding one subdirectory per index build;
+# DB_FAISS_PATH itself is a symlink to the live build
+VERSIONS_DIR = 'versions'
+KEEP_VERSIONS = int(os.environ.get('SUPERVAANI_INDEX_KEEP_VERSIONS', 3))
+
+EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+# Q&A sheets are indexed one document per row; bump when that format changes
+LOADER = 'qa-rows-v1'
+QUESTION_HEADERS = ('questions', 'question')
+ANSWER_HEADERS = ('answers', 'answer')
+
+# Build pipeline tuning for CPU hosts, overridable through the environment:
+# chunks per embedding call, processes parsing spreadsheets, and torch
+# threads (0 keeps torch's default) when the script loads its own model
+EMBED_BATCH_SIZE = int(os.environ.get('SUPERVAANI_EMBED_BATCH_SIZE', 64))
+INGEST_WORKERS = int(os.environ.get('SUPERVAANI_INGEST_WORKERS', min(4, os.cpu_count() or 1)))
+EMBED_THREADS = int(os.environ.get('SUPERVAANI_EMBED_THREADS', 0))
+
+
+def file_hash(path):
+    """
+    Get the SHA-256 of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_data_files(data_path=DATA_PATH):
+    """
+    Get the content hash of every spreadsheet in the data directory.
+
+    Returns:
+        dict: File name to SHA-256
+    """
+    files = {}
+    for name in sorted(os.listdir(data_path)):
+        path = os.path.join(data_path, name)
+        # Skip Office lock files and anything that is not a regular file
+        if name.startswith(('.', '~$')) or not os.path.isfile(path):
+            continue
+        files[name] = file_hash(path)
+    return files
+
+
+def load_manifest(db_path=DB_FAISS_PATH):
+    """
+    Load the manifest of the existing index.
+
+    Returns:
+        dict: The manifest, or None if there is no usable index to extend
+    """
+    try:
+        with open(os.path.join(db_path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    settings = {'model': EMBEDDING_MODEL, 'loader': LOADER,
+                'chunk_size': CHUNK_SIZE, 'chunk_overlap': CHUNK_OVERLAP}
+    if any(manifest.get(key) != value for key, value in settings.items()):
+        logger.info("Embedding model, loader or chunking changed, rebuilding the index")
+        return None
+    if not all(os.path.exists(os.path.join(db_path, f)) for f in ('index.faiss', 'index.pkl')):
+        return None
+    return manifest
+
+
+def normalize_cell(value):
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+def row_id(question, answer):
+    """
+    Get an ID shared by every copy of a Q&A row, in any file.
+    """
+    key = f"{question.lower()}\x1f{answer.lower()}".encode('utf-8')
+    return "qa:" + hashlib.sha256(key).hexdigest()[:32]
+
+
+def load_qa_rows(name, data_path=DATA_PATH):
+    """
+    Stream the Q&A rows of a spreadsheet as one document per row.
+
+    Every sheet whose first row has a Questions/Question and an
+    Answers/Answer column is read in openpyxl's read-only mode, so large
+    workbooks are never held in memory as a whole.
+
+    Returns:
+        list: Documents with the question and answer as metadata, or None
+        if no sheet has Q&A columns
+    """
+    workbook = load_workbook(os.path.join(data_path, name), read_only=True, data_only=True)
+    try:
+        documents = None
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            headers = [normalize_cell(cell).lower() for cell in next(rows, ())]
+            question_col = next((i for i, h in enumerate(headers) if h in QUESTION_HEADERS), None)
+            answer_col = next((i for i, h in enumerate(headers) if h in ANSWER_HEADERS), None)
+            if question_col is None or answer_col is None:
+                continue
+            documents = documents or []
+            for number, row in enumerate(rows, 2):
+                question = normalize_cell(row[question_col] if question_col < len(row) else None)
+                answer = normalize_cell(row[answer_col] if answer_col < len(row) else None)
+                if not question or not answer:
+                    continue
+                documents.append(Document(
+                    page_content=f"Question: {question}\nAnswer: {answer}",
+                    metadata={'source': name, 'sheet': sheet.title, 'row': number,
+                              'question': question, 'answer': answer}
+                ))
+        return documents
+    finally:
+        workbook.close()
+
+
+def split_file(name, sha, data_path=DATA_PATH):
+    """
+    Load and chunk one spreadsheet.
+
+    Q&A sheets give one chunk per row, identified by its content so
+    identical rows share an ID. Other workbooks are flattened and split
+    by characters.
+
+    Returns:
+        tuple: (chunks, chunk IDs); IDs are stable for the same file content
+    """
+    rows = load_qa_rows(name, data_path)
+    if rows is not None:
+        return rows, [row_id(doc.metadata['question'], doc.metadata['answer']) for doc in rows]
+
+    documents = UnstructuredExcelLoader(os.path.join(data_path, name)).load()
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE,
+                                                   chunk_overlap=CHUNK_OVERLAP)
     texts = text_splitter.split_documents(documents)
+    ids = [f"{name}:{sha[:16]}:{i}" for i in range(len(texts))]
+    return texts, ids
+
+
+def publish_version(db, manifest, db_path=DB_FAISS_PATH):
+    """
+    Save the index as a new version and switch db_path to it.
+
+    Each build is written to its own directory under VERSIONS_DIR and
+    db_path is a symlink to the live one, replaced atomically. Readers
+    therefore see either the old or the new index, never a mix of files,
+    and a running server can keep using the old version until it has
+    loaded the new one. Only the newest KEEP_VERSIONS versions are kept.
+
+    Returns:
+        str: The new version's name
+    """
+    parent = os.path.dirname(os.path.normpath(db_path))
+    versions = os.path.join(parent, VERSIONS_DIR)
+    os.makedirs(versions, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=versions)
+    try:
+        db.save_local(staging)
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        version = datetime.now().strftime('v%Y%m%d-%H%M%S-%f')
+        os.rename(staging, os.path.join(versions, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    adopt_legacy_index(db_path)
+    link = db_path + '.link'
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.join(VERSIONS_DIR, version), link)
+    os.replace(link, db_path)
+
+    collect_old_versions(db_path)
+    return version
+
+
+def adopt_legacy_index(db_path=DB_FAISS_PATH):
+    """
+    Move an index saved directly at db_path into the versions directory.
+
+    Older deployments wrote db_path as a plain directory; it becomes the
+    oldest version so it can be swapped out and collected like any other.
+    """
+    if os.path.isdir(db_path) and not os.path.islink(db_path):
+        parent = os.path.dirname(os.path.normpath(db_path))
+        os.rename(db_path, os.path.join(parent, VERSIONS_DIR, 'v00000000-legacy'))
+
+
+def collect_old_versions(db_path=DB_FAISS_PATH, keep=KEEP_VERSIONS):
+    """
+    Delete all but the newest ``keep`` versions, never the live one.
+
+    A few old versions are kept so a server process that is still loading
+    one when the link switches can finish. The caller holds the index lock,
+    so leftover staging directories are from crashed builds and removed too.
+    """
+    parent = os.path.dirname(os.path.normpath(db_path))
+    versions = os.path.join(parent, VERSIONS_DIR)
+    live = os.path.basename(os.path.realpath(db_path))
+    names = sorted(os.listdir(versions))
+    built = [name for name in names if name.startswith('v')]
+    stale = [name for name in built[:max(0, len(built) - keep)] if name != live]
+    stale += [name for name in names if name.startswith('.staging-')]
+    for name in stale:
+        shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+
+
+def index_lock(db_path=DB_FAISS_PATH):
+    """
+    Open and exclusively lock the lock file of an index.
+
+    Holding it keeps two processes from updating the same index at once;
+    the lock is released when the returned file is closed.
+    """
+    parent = os.path.dirname(os.path.normpath(db_path))
+    os.makedirs(parent, exist_ok=True)
+    lock = open(os.path.join(parent, LOCK_FILE), 'w')
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    return lock
+
+
+def configure_torch_threads(threads=EMBED_THREADS):
+    """
+    Pin the number of threads torch uses for CPU inference; 0 keeps its default.
+    """
+    if threads <= 0:
+        return
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def parsed_files(names, files, data_path=DATA_PATH, workers=INGEST_WORKERS, processes=True):
+    """
+    Parse and split files ahead of the caller in a pool of workers.
+
+    Files are yielded in order as soon as they are ready, so the caller
+    embeds one file while the next ones are parsed. At most two files per
+    worker are parsed ahead, which bounds the memory held by waiting chunks.
+
+    Args:
+        processes (bool): Parse in spawned processes. Spawned workers
+            re-import the parent's __main__ module, so a long-running
+            server should pass False and parse on threads instead
+
+    Yields:
+        tuple: (file name, chunks, chunk IDs)
+    """
+    workers = min(workers, len(names))
+    if workers < 1 or (workers == 1 and processes):
+        for name in names:
+            yield (name,) + split_file(name, files[name], data_path)
+        return
+
+    # Spawned, not forked: the parent may hold torch threads and locks
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-parse")
+    with pool:
+        remaining = iter(names)
+        in_flight = deque()
+        for name in islice(remaining, 2 * workers):
+            in_flight.append((name, pool.submit(split_file, name, files[name], data_path)))
+        while in_flight:
+            name, future = in_flight.popleft()
+            texts, ids = future.result()
+            following = next(remaining, None)
+            if following is not None:
+                in_flight.append((following, pool.submit(split_file, following, files[following], data_path)))
+            yield name, texts, ids
+
+
+def add_chunks(db, texts, ids, embeddings, batch_size=EMBED_BATCH_SIZE):
+    """
+    Embed chunks in batches and add them to the index.
+
+    Returns:
+        FAISS: The index, created on the first batch if db is None
+    """
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        contents = [text.page_content for text in batch]
+        pairs = list(zip(contents, embeddings.embed_documents(contents)))
+        metadatas = [text.metadata for text in batch]
+        batch_ids = ids[start:start + batch_size]
+        if db is None:
+            db = FAISS.from_embeddings(pairs, embeddings, metadatas=metadatas, ids=batch_ids)
+        else:
+            db.add_embeddings(pairs, metadatas=metadatas, ids=batch_ids)
+    return db
+
+
+# Create or update the vector database
+def create_vector_db(full=False, embeddings=None, progress=None,
+                     data_path=DATA_PATH, db_path=DB_FAISS_PATH, workers=INGEST_WORKERS, processes=True):
+    """
+    Bring the index up to date with the spreadsheets in data_path.
+
+    Only new and changed files are embedded and added to the existing
+    index; chunks of changed and deleted files are removed from it. Pass
+    full=True, or start without a manifest, to rebuild from scratch.
+
+    Args:
+        full (bool): Rebuild the whole index
+        embeddings (Embeddings): Model to embed with; a new one is loaded if not given
+        progress (callable): Called as progress(stage, done, total) while ingesting
+        data_path (str): Directory of spreadsheets to ingest
+        db_path (str): Path of the live index
+        workers (int): Workers parsing spreadsheets while chunks are embedded
+        processes (bool): Parse in spawned processes rather than threads; see parsed_files
+
+    Returns:
+        dict: File and chunk counts and the time spent in each stage
+    """
+    with index_lock(db_path):
+        return _update_vector_db(full, embeddings, progress or (lambda stage, done, total: None),
+                                 data_path, db_path, workers, processes)
+
+
+def _update_vector_db(full, embeddings, progress, data_path, db_path, workers, processes):
+    timings = {}
+    started = time.perf_counter()
+    progress('scanning', 0, 0)
+    files = list_data_files(data_path)
+    manifest = None if full else load_manifest(db_path)
+    ingested = manifest['files'] if manifest else {}
+
+    removed = [name for name in ingested if name not in files]
+    changed = [name for name, sha in files.items() if name in ingested and ingested[name]['sha256'] != sha]
+    added = [name for name in files if name not in ingested]
+
+    # Chunks shared with files that stay are kept; see row_id()
+    kept = {chunk_id for name, entry in ingested.items()
+            if name not in removed and name not in changed for chunk_id in entry['chunk_ids']}
+    stale = list(dict.fromkeys(chunk_id for name in removed + changed
+                               for chunk_id in ingested[name]['chunk_ids'] if chunk_id not in kept))
+    summary = {
+        'files_added': len(added),
+        'files_changed': len(changed),
+        'files_removed': len(removed),
+        'chunks_added': 0,
+        'chunks_removed': len(stale),
+        'chunks_deduplicated': 0,
+        'chunks_total': None,
+        'chunks_per_second': None,
+        'version': None,
+        'timings': timings,
+    }
+    timings['scan_seconds'] = round(time.perf_counter() - started, 3)
+
+    if not (removed or changed or added):
+        logger.info("Index is up to date, nothing to ingest")
+        return summary
+
+    started = time.perf_counter()
+    progress('loading', 0, 0)
+    if embeddings is None:
+        configure_torch_threads()
+        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL,
+                                           model_kwargs={'device': 'cpu'},
+                                           encode_kwargs={'batch_size': EMBED_BATCH_SIZE})
+    db = None
+    if manifest:
+        db = FAISS.load_local(db_path, embeddings, allow_dangerous_deserialization=True)
+        if stale:
+            db.delete(stale)
+    timings['load_seconds'] = round(time.perf_counter() - started, 3)
+
+    for name in removed:
+        del ingested[name]
+
+    started = time.perf_counter()
+    pending = changed + added
+    progress('embedding', 0, len(pending))
+    for done, (name, texts, ids) in enumerate(parsed_files(pending, files, data_path, workers, processes), 1):
+        # Rows already indexed from another file, or earlier in this one, are not embedded again
+        fresh = {}
+        for text, chunk_id in zip(texts, ids):
+            if chunk_id not in kept and chunk_id not in fresh:
+                fresh[chunk_id] = text
+        db = add_chunks(db, list(fresh.values()), list(fresh), embeddings)
+        kept.update(fresh)
+        ingested[name] = {'sha256': files[name], 'chunk_ids': list(dict.fromkeys(ids))}
+        summary['chunks_added'] += len(fresh)
+        summary['chunks_deduplicated'] += len(ids) - len(fresh)
+        progress('embedding', done, len(pending))
+    elapsed = time.perf_counter() - started
+    timings['embed_seconds'] = round(elapsed, 3)
+    if elapsed > 0:
+        summary['chunks_per_second'] = round(summary['chunks_added'] / elapsed, 1)
 
-    embeddings = HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2',
-                                       model_kwargs={'device': 'cpu'})
+    if db is None:
+        logger.warning("No content to index")
+        return summary
 
-    db = FAISS.from_documents(texts, embeddings)
-    db.save_local(DB_FAISS_PATH)
+    started = time.perf_counter()
+    progress('saving', len(pending), len(pending))
+    version = publish_version(db, {
+        'model': EMBEDDING_MODEL,
+        'loader': LOADER,
+        'chunk_size': CHUNK_SIZE,
+        'chunk_overlap': CHUNK_OVERLAP,
+        'files': ingested,
+    }, db_path)
+    timings['save_seconds'] = round(time.perf_counter() - started, 3)
+    summary['chunks_total'] = db.index.ntotal
+    summary['version'] = version
+    logger.info(f"Ingested {len(added)} new and {len(changed)} changed file(s), "
+                f"removed {len(removed)}; index holds {db.index.ntotal} chunks "
+                f"({summary['chunks_per_second']} chunks/s)")
+    return summary
 
 
 if __name__ == "__main__":
-    create_vector_db()
+    create_vector_db(full='--full' in sys.argv[1:])
     # create_enhanced_courses_vector_db()
     # create_expertise_vector_db()
 #    create_unified_sql_vector_db()
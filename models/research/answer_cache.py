@@ -0,0 +1,258 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+from models.research.retrieval import embeddings, vectorstores
+from models.research.sql_chain import sql_engine
+from models.research.router import route_question
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cache limits, overridable through the environment
+ANSWER_CACHE_SIZE = int(os.environ.get('SUPERVAANI_ANSWER_CACHE_SIZE', 1000))
+ANSWER_CACHE_TTL = int(os.environ.get('SUPERVAANI_ANSWER_CACHE_TTL', 6 * 60 * 60))
+ANSWER_CACHE_THRESHOLD = float(os.environ.get('SUPERVAANI_ANSWER_CACHE_THRESHOLD', 0.95))
+
+# Vectorstore whose version an answer depends on, per route
+ROUTE_INDEXES = {
+    "retrieve_other": "others",
+    "faculty": "sql_unified",
+    "founder": "personnel",
+    "retrieve_library": "library",
+}
+
+# Routes whose answers also come from the faculty tables
+SQL_ROUTES = {"faculty"}
+
+class RouteEntries:
+    """
+    Cached answers for one route, with their query vectors stacked for search.
+    """
+
+    def __init__(self):
+        self.reset(None)
+
+    @property
+    def matrix(self):
+        if self._matrix is None and self.answers:
+            self._matrix = np.vstack(self.vectors)
+        return self._matrix
+
+    def reset(self, version):
+        self.answers, self.queries, self.created, self.vectors = [], [], [], []
+        self.version = version
+        self._matrix = None
+
+    def add(self, query, answer, created, vector):
+        self.queries.append(query)
+        self.answers.append(answer)
+        self.created.append(created)
+        self.vectors.append(vector)
+        self._matrix = None
+
+    def remove(self, index):
+        for column in (self.answers, self.queries, self.created, self.vectors):
+            del column[index]
+        self._matrix = None
+
+class SemanticAnswerCache:
+    """
+    Cache of generated answers looked up by query similarity.
+
+    An answer is reused when a new question on the same route has a
+    cosine similarity of at least ``threshold`` with a cached question and
+    the route's vectorstore has not been reloaded since. Answers on the
+    faculty route are also stamped with the data version of the faculty
+    tables, so they are dropped when the tables change. Entries expire
+    after ``ttl`` seconds, and the oldest entry is dropped once the cache
+    holds ``max_size`` answers.
+    """
+
+    def __init__(self, embeddings, vectorstores, sql_engine=None, max_size=ANSWER_CACHE_SIZE,
+                 ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_THRESHOLD, clock=time.time):
+        self.embeddings = embeddings
+        self.vectorstores = vectorstores
+        self.sql_engine = sql_engine
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self._clock = clock
+        self._routes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _embed(self, query):
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _version(self, route):
+        # None when the answers of the route cannot be versioned, so not cached
+        version = self.vectorstores.version(ROUTE_INDEXES[route])
+        if route in SQL_ROUTES:
+            data_version = self.sql_engine.data_version() if self.sql_engine is not None else None
+            return None if data_version is None else (version, data_version)
+        return version
+
+    def _entries(self, route, version):
+        # Caller holds the lock; a reloaded vectorstore invalidates the route
+        entries = self._routes.setdefault(route, RouteEntries())
+        if entries.version != version:
+            if entries.answers:
+                self.invalidations += len(entries.answers)
+                logger.info(f"Invalidated {len(entries.answers)} cached answer(s) for route {route}")
+            entries.reset(version)
+        return entries
+
+    def lookup(self, query, route):
+        """
+        Find a cached answer for a question.
+
+        Returns:
+            str: The cached answer, or None
+        """
+        if self.max_size <= 0 or route not in ROUTE_INDEXES:
+            return None
+        version = self._version(route)
+        if version is None:
+            return None
+        vector = self._embed(query)
+        now = self._clock()
+        with self._lock:
+            entries = self._entries(route, version)
+            while entries.answers and now - entries.created[0] > self.ttl:
+                entries.remove(0)
+                self.expirations += 1
+            if entries.answers:
+                scores = entries.matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return entries.answers[best]
+            self.misses += 1
+            return None
+
+    def store(self, query, route, answer):
+        """
+        Cache the answer generated for a question.
+        """
+        if self.max_size <= 0 or route not in ROUTE_INDEXES or not answer:
+            return
+        version = self._version(route)
+        if version is None:
+            return
+        vector = self._embed(query)
+        with self._lock:
+            entries = self._entries(route, version)
+            entries.add(query, answer, self._clock(), vector)
+            self._evict()
+
+    def _evict(self):
+        # Caller holds the lock; drop the oldest answers across all routes
+        while sum(len(entries.answers) for entries in self._routes.values()) > self.max_size:
+            oldest = min((entries for entries in self._routes.values() if entries.answers),
+                         key=lambda entries: entries.created[0])
+            oldest.remove(0)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+    def stats(self):
+        """
+        Get cache metrics.
+
+        Returns:
+            dict: Hit, miss, eviction, expiration and invalidation counts and sizes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'size': sum(len(entries.answers) for entries in self._routes.values()),
+                'max_size': self.max_size,
+                'routes': {route: len(entries.answers) for route, entries in self._routes.items()}
+            }
+
+# Process-wide cache shared by all requests
+answer_cache = SemanticAnswerCache(embeddings, vectorstores, sql_engine)
+
+def is_cacheable(state):
+    """
+    Check whether the answer to a question can be shared with other users.
+
+    The answer is written with the conversation history in the prompt, so
+    it may depend on earlier turns even when the question looks
+    self-contained, as in "What is the email?". Only the first question of
+    a conversation, which was not rewritten as a follow-up, is looked up
+    and cached.
+    """
+    if (state.get("history") or "").strip():
+        return False
+    query = state.get("standalone_query") or state["question"]
+    return query == state["question"]
+
+### Nodes
+def check_answer_cache(state):
+    """
+    Route the question and look for a cached answer on that route.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        state (dict): New keys added to state, route and, on a hit, generation
+    """
+    print("---CHECK ANSWER CACHE---")
+    route = route_question(state)
+    generation = None
+    if is_cacheable(state):
+        try:
+            generation = answer_cache.lookup(state["question"], route)
+        except Exception as e:
+            logger.error(f"Answer cache lookup failed: {e}")
+    return {"route": route, "generation": generation}
+
+def cache_answer(state):
+    """
+    Store a freshly generated answer in the cache.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        state (dict): Unchanged
+    """
+    documents = state.get("documents") or []
+    failed = any(getattr(doc, "page_content", "").startswith("Error:") for doc in documents)
+    if is_cacheable(state) and not failed:
+        try:
+            answer_cache.store(state["question"], state["route"], state.get("generation"))
+        except Exception as e:
+            logger.error(f"Answer cache store failed: {e}")
+    return {}
+
+### Conditional edge
+def route_after_cache(state):
+    """
+    End the workflow on a cache hit, otherwise retrieve for the chosen route.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        str: Next node to call
+    """
+    return "cached" if state.get("generation") else state["route"]
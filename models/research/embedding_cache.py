@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cache limits, overridable through the environment. Persistence is off
+# unless a path is given.
+EMBEDDING_CACHE_SIZE = int(os.environ.get('SUPERVAANI_EMBEDDING_CACHE_SIZE', 10000))
+EMBEDDING_CACHE_PATH = os.environ.get('SUPERVAANI_EMBEDDING_CACHE_PATH', '')
+
+def normalize_query(text):
+    """
+    Normalise query text so trivially different spellings share an entry.
+
+    MiniLM is uncased, so case and runs of whitespace do not change the
+    embedding.
+    """
+    return " ".join(text.split()).lower()
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings with a bounded LRU cache of query vectors.
+
+    Only embed_query is cached; document embedding for index builds goes
+    straight to the wrapped model. Entries are keyed by model name and
+    normalised query text, and can be written through to a SQLite file so
+    the cache survives restarts. The file is trimmed back to the newest
+    ``max_size`` entries on load and whenever ``max_size`` new entries have
+    been written since the last trim, so it holds at most twice the cap.
+    """
+
+    def __init__(self, embeddings, model_name, max_size=EMBEDDING_CACHE_SIZE, path=EMBEDDING_CACHE_PATH):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_size = max_size
+        self.path = path
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._loaded = False
+        self._untrimmed = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ready(self):
+        return getattr(self.embeddings, "ready", True)
+
+    def warm_up(self):
+        """
+        Load persisted vectors and build the wrapped model.
+        """
+        self._load()
+        warm_up = getattr(self.embeddings, "warm_up", None)
+        if warm_up is not None:
+            warm_up()
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        self._load()
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+                self.hits += 1
+                return list(vector)
+            self.misses += 1
+
+        vector = self.embeddings.embed_query(key)
+        with self._lock:
+            self._put(key, vector)
+        self._persist(key, vector)
+        return list(vector)
+
+    def stats(self):
+        """
+        Get cache metrics.
+
+        Returns:
+            dict: Hits, misses, hit rate and the resident size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'model': self.model_name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._vectors),
+                'max_size': self.max_size,
+                'persistent': bool(self.path)
+            }
+
+    def _put(self, key, vector):
+        # Caller holds the lock
+        self._vectors[key] = tuple(vector)
+        self._vectors.move_to_end(key)
+        while len(self._vectors) > self.max_size:
+            self._vectors.popitem(last=False)
+
+    def _persist(self, key, vector):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute('''
+                INSERT OR REPLACE INTO query_embeddings (model, query, vector)
+                VALUES (?, ?, ?)
+                ''', (self.model_name, key, array('f', vector).tobytes()))
+                self._untrimmed += 1
+                if self._untrimmed >= self.max_size:
+                    # Trimmed in the same transaction as the insert
+                    self._trim()
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Could not persist query embedding: {e}")
+
+    def _trim(self):
+        # Caller holds the database lock and commits
+        self._db.execute('''
+        DELETE FROM query_embeddings
+        WHERE model = ? AND rowid NOT IN (
+            SELECT rowid FROM query_embeddings
+            WHERE model = ? ORDER BY rowid DESC LIMIT ?
+        )
+        ''', (self.model_name, self.model_name, self.max_size))
+        self._untrimmed = 0
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.path:
+                return
+            try:
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode = WAL")
+                self._db.execute('''
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, query)
+                )
+                ''')
+                # Most recently written entries last, so they survive the LRU cap
+                rows = self._db.execute('''
+                SELECT query, vector FROM (
+                    SELECT rowid, query, vector FROM query_embeddings
+                    WHERE model = ? ORDER BY rowid DESC LIMIT ?
+                ) ORDER BY rowid ASC
+                ''', (self.model_name, self.max_size)).fetchall()
+                for query, blob in rows:
+                    self._put(query, array('f', blob).tolist())
+
+                # Drop entries that no longer fit so the file stays bounded too
+                with self._db_lock:
+                    self._trim()
+                    self._db.commit()
+                logger.info(f"Loaded {len(rows)} cached query embeddings from {self.path}")
+            except sqlite3.Error as e:
+                logger.error(f"Query embedding cache persistence disabled: {e}")
+                self._db = None
@@ -0,0 +1,260 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+from sqlalchemy import text
+from rapidfuzz import fuzz, process
+from langchain_core.documents import Document
+from models.research.sql_cache import data_version_query, SQL_VERSION_CHECK_INTERVAL
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Lookup tuning, overridable through the environment. Name tokens match
+# at NAME_MATCH_CUTOFF similarity (0-100), runs of question words match
+# whole topics at KEYWORD_MATCH_CUTOFF, and lookups that leave more than
+# FACULTY_MAX_RESULTS professors are left to the LLM.
+NAME_MATCH_CUTOFF = float(os.environ.get('SUPERVAANI_FACULTY_NAME_CUTOFF', 90))
+KEYWORD_MATCH_CUTOFF = float(os.environ.get('SUPERVAANI_FACULTY_KEYWORD_CUTOFF', 90))
+FACULTY_MAX_RESULTS = int(os.environ.get('SUPERVAANI_FACULTY_MAX_RESULTS', 8))
+
+PROFESSORS = 'SELECT id, name, email, webpage FROM professors'
+PROFESSOR_EXPERTISE = '''
+SELECT pe.professor_id, e.name
+FROM professor_expertise pe JOIN expertise e ON e.id = pe.expertise_id
+'''
+PROFESSOR_COURSES = '''
+SELECT cp.professor_id, c.course_title, c.credits
+FROM course_professors cp JOIN courses_m_2025 c ON c.id = cp.course_id
+'''
+
+# Words that say what is asked, not who or what it is about
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "about", "can", "contact", "course", "courses", "details",
+    "do", "does", "dr", "email", "expert", "expertise", "faculty", "field", "for", "give", "has",
+    "have", "his", "her", "how", "i", "in", "is", "me", "mail", "members", "of", "on", "or",
+    "prof", "professor", "professors", "research", "show", "subject", "teach", "teaches",
+    "teaching", "tell", "that", "the", "their", "them", "to", "webpage", "website", "what",
+    "which", "who", "whom", "with", "works", "work", "area", "areas", "list", "taught", "by",
+}
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokens(value):
+    return [token for token in TOKEN.findall(str(value).lower()) if token not in STOPWORDS]
+
+def acronym(phrase):
+    """
+    Get the acronym of a multi-word phrase, e.g. "Machine Learning" -> "ml".
+    """
+    words = tokens(phrase)
+    return "".join(word[0] for word in words) if len(words) > 1 else None
+
+class FacultyRecord:
+    """
+    One professor with their expertise and courses.
+    """
+
+    def __init__(self, name, email, webpage):
+        self.name = name
+        self.email = email
+        self.webpage = webpage
+        self.expertise = []
+        self.courses = []
+
+    def to_text(self):
+        courses = [f"{title} ({credits} credits)" if credits else title for title, credits in self.courses]
+        return "\n".join([
+            f"Name: {self.name}",
+            f"Email: {self.email or 'not listed'}",
+            f"Webpage: {self.webpage or 'not listed'}",
+            f"Expertise: {', '.join(self.expertise) or 'not listed'}",
+            f"Courses: {', '.join(courses) or 'not listed'}",
+        ])
+
+class FacultySnapshot:
+    """
+    Immutable lookup structures built from one read of the faculty tables.
+
+    Topics are whole expertise names and course titles. A question matches
+    a topic only through a run of consecutive words that is similar to the
+    whole topic, or through the topic's acronym, so one shared word such as
+    "computer" does not match "Computer Vision".
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.name_tokens = defaultdict(set)
+        self.topics = defaultdict(set)
+        self.acronyms = defaultdict(set)
+        for professor_id, record in records.items():
+            for token in tokens(record.name):
+                if len(token) > 2:
+                    self.name_tokens[token].add(professor_id)
+            for phrase in record.expertise + [title for title, _ in record.courses]:
+                words = tokens(phrase)
+                if words:
+                    self.topics[" ".join(words)].add(professor_id)
+                short = acronym(phrase)
+                if short:
+                    self.acronyms[short].add(professor_id)
+        self.topic_words = {word for topic in self.topics for word in topic.split()}
+        self.topics_by_length = defaultdict(list)
+        for topic in self.topics:
+            self.topics_by_length[len(topic.split())].append(topic)
+        self.name_vocabulary = list(self.name_tokens)
+
+    def by_name(self, words):
+        scores = defaultdict(int)
+        for word in words:
+            # Topic words are not fuzzily read as names
+            if len(word) < 3 or (word in self.topic_words and word not in self.name_tokens):
+                continue
+            for token, _, _ in process.extract(word, self.name_vocabulary, scorer=fuzz.ratio,
+                                                score_cutoff=NAME_MATCH_CUTOFF, limit=5):
+                for professor_id in self.name_tokens[token]:
+                    scores[professor_id] += 1
+        return scores
+
+    def by_keyword(self, words):
+        scores = defaultdict(int)
+        matched = set()
+        for length, topics in self.topics_by_length.items():
+            for start in range(len(words) - length + 1):
+                span = " ".join(words[start:start + length])
+                if span in self.topics:
+                    matched.add(span)
+                elif len(span) >= 5:
+                    # Fuzzy matches catch plurals and typos; short spans must match exactly
+                    matched.update(topic for topic, _, _ in process.extract(
+                        span, topics, scorer=fuzz.ratio, score_cutoff=KEYWORD_MATCH_CUTOFF, limit=5))
+        for topic in matched:
+            for professor_id in self.topics[topic]:
+                scores[professor_id] += 1
+        for word in words:
+            for professor_id in self.acronyms.get(word, ()):
+                scores[professor_id] += 1
+        return scores
+
+class FacultyIndex:
+    """
+    In-process, denormalised index of the faculty tables.
+
+    Holds one record per professor with expertise, courses, email and
+    webpage, plus a fuzzy name index and an index of expertise and course
+    titles and their acronyms. Questions that name professors, ask about a
+    topic that singles out a few professors, or both, are answered from
+    memory without the LLM-SQL round trip. The index is
+    rebuilt when the data version stamp of the tables changes, checked at
+    most every ``check_interval`` seconds; lookups keep using the previous
+    snapshot while it rebuilds.
+    """
+
+    def __init__(self, sql_engine, check_interval=SQL_VERSION_CHECK_INTERVAL, max_results=FACULTY_MAX_RESULTS):
+        self.sql_engine = sql_engine
+        self.check_interval = check_interval
+        self.max_results = max_results
+        self._snapshot = None
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.build_seconds = None
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self):
+        records = {}
+        with self.sql_engine.engine.connect() as conn:
+            for professor_id, name, email, webpage in conn.execute(text(PROFESSORS)):
+                records[professor_id] = FacultyRecord(name, email, webpage)
+            for professor_id, expertise in conn.execute(text(PROFESSOR_EXPERTISE)):
+                if professor_id in records and expertise:
+                    records[professor_id].expertise.append(expertise)
+            for professor_id, title, credits in conn.execute(text(PROFESSOR_COURSES)):
+                if professor_id in records and title:
+                    records[professor_id].courses.append((title, credits))
+        return FacultySnapshot(records)
+
+    def snapshot(self):
+        """
+        Get the current snapshot, building or rebuilding it if needed.
+
+        Returns:
+            FacultySnapshot: The snapshot, or None if the tables could not be read
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._snapshot
+        # Failed builds are retried after the check interval too. Only the
+        # first build waits; later lookups use the current snapshot while another rebuilds
+        if not self._lock.acquire(blocking=self._snapshot is None):
+            return self._snapshot
+        try:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._snapshot
+            self._checked_at = now
+            db = self.sql_engine.db
+            version = db.run(data_version_query(db.dialect))
+            if version != self._version or self._snapshot is None:
+                started = time.perf_counter()
+                self._snapshot = self._read()
+                self._version = version
+                self.build_seconds = time.perf_counter() - started
+                logger.info(f"Built faculty index of {len(self._snapshot.records)} professors "
+                            f"in {self.build_seconds * 1000:.0f} ms")
+        except Exception as e:
+            logger.error(f"Could not build the faculty index: {e}")
+        finally:
+            self._lock.release()
+        return self._snapshot
+
+    def warm_up(self):
+        self.snapshot()
+
+    def lookup(self, question):
+        """
+        Answer a faculty question from the index if it is specific enough.
+
+        Returns:
+            list: A document per matching professor, or an empty list when
+            the question should go to the LLM-SQL path
+        """
+        snapshot = self.snapshot()
+        matches = []
+        if snapshot is not None:
+            words = tokens(question)
+            # A question can name a professor and ask about a topic at once
+            for scores in (snapshot.by_name(words), snapshot.by_keyword(words)):
+                if scores:
+                    best = max(scores.values())
+                    matches += [professor_id for professor_id, score in scores.items()
+                                if score == best and professor_id not in matches]
+        if not matches or len(matches) > self.max_results:
+            self.misses += 1
+            return []
+        self.hits += 1
+        return [
+            Document(page_content=snapshot.records[professor_id].to_text(),
+                     metadata={"source": "faculty_index"})
+            for professor_id in matches
+        ]
+
+    def stats(self):
+        """
+        Get index metrics.
+
+        Returns:
+            dict: Professors indexed, build time, and questions answered or passed on
+        """
+        snapshot = self._snapshot
+        lookups = self.hits + self.misses
+        return {
+            'professors': 0 if snapshot is None else len(snapshot.records),
+            'topics': 0 if snapshot is None else len(snapshot.topics),
+            'build_ms': None if self.build_seconds is None else round(self.build_seconds * 1000, 1),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -20,9 +20,10 @@ def generate(state):
     """
     print("---GENERATE---")
     question = state["question"]
+    history = state.get("history", "")
     documents = state["documents"]
 
-    # RAG generation
-    generation = rag_chain.invoke({"documents": documents, "question": question})
+    # RAG generation; the conversation history is only needed here
+    generation = rag_chain.invoke({"documents": documents, "question": question, "history": history})
     return {"documents": documents, "question": question, "generation": generation}
 
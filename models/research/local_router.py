@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Confidence needed to skip the LLM router, overridable through the environment.
+# A question is routed locally when its best centroid is at least this similar
+# and beats the runner-up by at least the margin.
+ROUTER_MIN_SIMILARITY = float(os.environ.get('SUPERVAANI_ROUTER_MIN_SIMILARITY', 0.35))
+ROUTER_MIN_MARGIN = float(os.environ.get('SUPERVAANI_ROUTER_MIN_MARGIN', 0.05))
+
+# Labelled example questions per datasource, using the labels the LLM router returns
+ROUTE_EXAMPLES = {
+    "faculty": [
+        "Who teaches the machine learning course?",
+        "Which professor teaches Data Structures and Algorithms?",
+        "What is the email address of Professor Sharma?",
+        "What is the research expertise of Dr. Rao?",
+        "Which faculty members work on robotics?",
+        "Give me the webpage of the professor who teaches linear algebra",
+        "Who are the professors with expertise in computer vision?",
+        "How many credits is the probability and statistics course?",
+        "What courses does Professor Gupta teach?",
+        "Describe the course on signals and systems",
+        "Which professor can I contact about reinforcement learning research?",
+        "List the faculty in the economics area",
+    ],
+    "retrieve_library": [
+        "What are the library timings?",
+        "Is the library open on Sunday?",
+        "Does the library have books by Yuval Noah Harari?",
+        "How many books can I borrow from the library?",
+        "Can you find a book on deep learning in the library?",
+        "What is the late fee for returning a library book?",
+        "Is Introduction to Algorithms by Cormen available?",
+        "Which books are available on thermodynamics?",
+        "How do I renew a book I borrowed?",
+        "Books written by Stephen Hawking",
+        "What is the library's policy on reference books?",
+        "Recommend books about entrepreneurship from the library",
+    ],
+    "founder": [
+        "Who founded Plaksha University?",
+        "Who are the founders of Plaksha?",
+        "Tell me about the founders of the university",
+        "Which founder started a technology company?",
+        "What is the background of Plaksha's founding members?",
+        "Is Vinod Khosla a founder of Plaksha?",
+        "How many founders does Plaksha have?",
+        "Which founders are on the board of the university?",
+        "What companies did the Plaksha founders build?",
+        "Tell me about the founder who studied at IIT",
+    ],
+    "others": [
+        "Who should I contact in case of an emergency?",
+        "Who created you?",
+        "What is the hostel fee for the undergraduate program?",
+        "How do I apply for admission to Plaksha?",
+        "What scholarships are available for students?",
+        "Where is the campus located?",
+        "What is the attendance policy?",
+        "How do I get a leave of absence approved?",
+        "What clubs and student activities are there on campus?",
+        "What is the grading policy for the BTech program?",
+        "How do I reach the medical room at night?",
+        "What is the dress code on campus?",
+        "When does the semester start?",
+        "Whom do I contact for IT support?",
+    ],
+}
+
+class CentroidRouter:
+    """
+    Nearest-centroid question classifier over the query embeddings.
+
+    Each datasource is represented by the normalised mean embedding of its
+    example questions. A question is assigned to the most similar centroid
+    when the prediction is confident; otherwise classify() returns None so
+    the caller can fall back to the LLM router.
+    """
+
+    def __init__(self, embeddings, examples=ROUTE_EXAMPLES,
+                 min_similarity=ROUTER_MIN_SIMILARITY, min_margin=ROUTER_MIN_MARGIN):
+        self.embeddings = embeddings
+        self.examples = examples
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self._labels = None
+        self._centroids = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        if self._centroids is not None:
+            return
+        with self._lock:
+            if self._centroids is not None:
+                return
+            started = time.perf_counter()
+            labels, centroids = [], []
+            for label, questions in self.examples.items():
+                vectors = np.asarray(self.embeddings.embed_documents(questions), dtype=np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                centroid = vectors.mean(axis=0)
+                labels.append(label)
+                centroids.append(centroid / np.linalg.norm(centroid))
+            self._labels = labels
+            self._centroids = np.vstack(centroids)
+            logger.info(f"Built router centroids in {time.perf_counter() - started:.2f}s")
+
+    def scores(self, query):
+        """
+        Get the cosine similarity of a question to every datasource.
+
+        Returns:
+            dict: Similarity per datasource label, best first
+        """
+        self._build()
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        similarities = self._centroids @ (vector / norm if norm else vector)
+        ranked = sorted(zip(self._labels, similarities.tolist()), key=lambda item: item[1], reverse=True)
+        return dict(ranked)
+
+    def classify(self, query):
+        """
+        Pick a datasource for a question if the nearest centroid is a clear winner.
+
+        Returns:
+            tuple: (label, scores), with label None when the prediction is not confident
+        """
+        scores = self.scores(query)
+        ranked = list(scores.values())
+        best_label = next(iter(scores))
+        margin = ranked[0] - ranked[1] if len(ranked) > 1 else ranked[0]
+        if ranked[0] >= self.min_similarity and margin >= self.min_margin:
+            return best_label, scores
+        return None, scores
@@ -11,6 +11,7 @@ from langchain.chains import LLMChain
 import re
 from pprint import pprint
 import os
+import threading
 from langchain_groq import ChatGroq
 from langchain_ollama import ChatOllama
 from langchain_ollama.llms import OllamaLLM
@@ -27,8 +28,9 @@ from models.research.prompts import (
     prompt_question_router,
 )
 from models.research.retrieval import retrieve, retrieve_sql, retrieve_other, retrieve_library
-from models.research.router import route_sql, route_question
 from models.research.generator import generate
+from models.research.query import condense_question
+from models.research.answer_cache import check_answer_cache, cache_answer, route_after_cache
 
 local_llm = "llama3.1:8b"
 llm = ChatOllama(model=local_llm, format="json", temperature=0)
@@ -45,19 +47,27 @@ class GraphState(TypedDict):
     Represents the state of our graph.
 
     Attributes:
-        question: question
+        question: the user's current question
+        history: formatted earlier conversation, only used by generate
+        standalone_query: short query used for routing and retrieval
+        route: data source chosen by the router
         generation: LLM generation
-        web_search: whether to add search
         documents: list of documents
     """
 
     question: str
+    history: str
+    standalone_query: str
+    route: str
     generation: str
     documents: List[str]
 
 workflow = StateGraph(GraphState)
 
 # Define the nodes
+workflow.add_node("condense_question", condense_question)  # standalone query
+workflow.add_node("check_answer_cache", check_answer_cache)  # route + cached answer
+workflow.add_node("cache_answer", cache_answer)  # store generated answer
 workflow.add_node("retrieve", retrieve)  # retrieve
 workflow.add_node("retrieve_sql", retrieve_sql)  # retrieve sql
 workflow.add_node("retrieve_other", retrieve_other)  # retrieve sql
@@ -67,10 +77,14 @@ workflow.add_node("retrieve_library", retrieve_library) # retrieve library
 # Build the graph  
 
 
+workflow.add_edge(START, "condense_question")
+workflow.add_edge("condense_question", "check_answer_cache")
+
 workflow.add_conditional_edges(
-    START,
-    route_question,
+    "check_answer_cache",
+    route_after_cache,
     {
+        "cached": END,
         "retrieve_other": "retrieve_other",
         "faculty": "retrieve_sql",
         "founder": "retrieve", 
@@ -82,16 +96,29 @@ workflow.add_edge("retrieve_library", "generate")
 
 workflow.add_edge("retrieve", "generate")
 workflow.add_edge("retrieve_other", "generate")
+# Failed SQL is repaired inside sql_engine.infer, within a bounded number of
+# attempts and time, so retrieve_sql goes straight to generate
 workflow.add_edge("retrieve_sql", "generate")
-#workflow.add_conditional_edges(
-#    "retrieve_sql",
-#    route_sql,
-#    {
-#        "retrieve_sql": "retrieve_sql",
-#        "generate": "generate",
-#    }
-#)
-workflow.add_edge("generate", END,)
+workflow.add_edge("generate", "cache_answer")
+workflow.add_edge("cache_answer", END,)
 def create_app():
     app = workflow.compile()
     return app
+
+# Compiled workflow shared by every user; it keeps no conversation state
+_app = None
+_app_lock = threading.Lock()
+
+def get_app():
+    """
+    Get the process-wide compiled workflow, compiling it on first use.
+
+    Returns:
+        CompiledStateGraph: The shared workflow, safe to invoke from any thread
+    """
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
@@ -28,11 +28,12 @@ prompt_rag_chain = PromptTemplate(
 7.  **Guardrail:** If the necessary information is genuinely not present in the provided documents, confidently state that you do not have the information regarding that specific query.
 8. **No Course: ID**: Never return Course ID as part of the answer, it is used internally and not for the users.
 
+Previous conversation: {history}
 Question: {question}
 Documents: {documents}
 **SuperVanni's Answer:**
 """,
-    input_variables=["question", "documents"],
+    input_variables=["question", "documents", "history"],
 )
 
 # Hallucination Grader  
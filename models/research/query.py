@@ -0,0 +1,92 @@
+import re
+
+# Pronouns that point back at a person or course named earlier. "it",
+# "there", "this" and the like are left out: in questions such as "Is there
+# a hostel curfew?" they do not refer to anything said before.
+FOLLOW_UP_PRONOUNS = {"he", "she", "him", "her", "his", "hers", "they", "them", "their", "theirs"}
+
+# "that course", "the same professor": a demonstrative before one of these
+# nouns refers to something said before
+DEMONSTRATIVES = {"this", "that", "these", "those", "same"}
+REFERENTS = {
+    "course", "courses", "subject", "subjects", "class", "professor", "professors", "prof",
+    "faculty", "teacher", "person", "one", "ones", "department",
+}
+
+# Details asked about someone or something. A question made of these and
+# function words only, such as "What is the email?", has no subject of its own.
+ATTRIBUTES = {
+    "email", "mail", "e-mail", "webpage", "website", "page", "phone", "number", "contact",
+    "office", "address", "credits", "expertise", "courses", "timings", "timing", "fee", "fees",
+    "details", "description", "name", "designation",
+}
+FUNCTION_WORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "to", "in", "on", "at", "is", "are", "was",
+    "what", "what's", "whats", "which", "where", "how", "about", "me", "give", "tell", "show",
+    "can", "could", "you", "please", "i", "get", "do", "does", "also", "again",
+}
+
+# Follow-ups are short; anything longer is routed on its own
+FOLLOW_UP_MAX_WORDS = 12
+
+# Longest part of the previous question carried into a follow-up query
+PREVIOUS_QUESTION_MAX_CHARS = 300
+
+# User turns in a history formatted as "User: ...\n\nAssistant: ...\n\n"
+USER_TURN = re.compile(r"(?:^|\n\n)User: (.*?)(?=\n\nAssistant: |\n\n$|$)", re.DOTALL)
+
+def user_questions(history):
+    """
+    Get the questions the user asked in a formatted history, oldest first.
+    """
+    return [match.strip() for match in USER_TURN.findall(history or "")]
+
+def is_follow_up(question):
+    """
+    Check whether a question needs earlier turns to be understood.
+
+    A short question is a follow-up when it refers back with a personal
+    pronoun ("what does she teach?") or a demonstrative before a person or
+    course ("who teaches that course?"), or when it only asks for a detail
+    without saying whose ("what is the email?").
+    """
+    words = re.findall(r"[a-z'-]+", question.lower())
+    if not words or len(words) > FOLLOW_UP_MAX_WORDS:
+        return False
+    if any(word in FOLLOW_UP_PRONOUNS for word in words):
+        return True
+    if any(word in DEMONSTRATIVES and following in REFERENTS for word, following in zip(words, words[1:])):
+        return True
+    return any(word in ATTRIBUTES for word in words) and \
+        all(word in ATTRIBUTES or word in FUNCTION_WORDS for word in words)
+
+### Nodes
+def condense_question(state):
+    """
+    Build a short, standalone query for routing and retrieval.
+
+    Self-contained questions are used as they are. Short follow-ups such as
+    "what courses does he teach?" are prefixed with the latest earlier
+    question that stands on its own, so the router and retrievers know
+    what they refer to. The rest of the history is left for the generator.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        state (dict): New key added to state, standalone_query
+    """
+    print("---CONDENSE QUESTION---")
+    question = state["question"].strip()
+    standalone_query = question
+
+    if is_follow_up(question):
+        # Anchor on the latest question that stands on its own
+        previous = user_questions(state.get("history", ""))
+        anchor = next((q for q in reversed(previous) if not is_follow_up(q)),
+                      previous[-1] if previous else "")
+        anchor = anchor[:PREVIOUS_QUESTION_MAX_CHARS]
+        if anchor and anchor != question:
+            standalone_query = f"{anchor} {question}"
+
+    return {"standalone_query": standalone_query}
@@ -1,24 +1,30 @@
 from langchain_huggingface import HuggingFaceEmbeddings
+import os
 import logging
+import threading
 from typing import List
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-from models.research.sql_chain import load_db, chain_create, sql_infer
+from models.research.sql_chain import sql_engine
+from models.research.faculty_index import FacultyIndex
+from models.research.vectorstores import LazyEmbeddings, VectorStoreRegistry
+from models.research.embedding_cache import CachedEmbeddings
 
 DB_FAISS_PATH_PERSONNEL = '/home/anupam/SuperVaani/models/vectorstore_personnel/db_faiss/'
 DB_FAISS_PATH_OTHERS = "/home/anupam/SuperVaani/models/vectorstore_others/db_faiss/"
 DB_FAISS_PATH_LIBRARY = "/home/anupam/SuperVaani/models/vectorstore_library/db_faiss/"
 
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2",
-                                       model_kwargs={'device': 'cpu'})
-db_personnel = FAISS.load_local(DB_FAISS_PATH_PERSONNEL, embeddings, allow_dangerous_deserialization=True)
-db_others = FAISS.load_local(DB_FAISS_PATH_OTHERS, embeddings, allow_dangerous_deserialization=True)
-db_library = FAISS.load_local(DB_FAISS_PATH_LIBRARY, embeddings, allow_dangerous_deserialization=True)
+# Warm indexes up in the background at import, or load each on first use
+INDEX_WARMUP = os.environ.get('SUPERVAANI_INDEX_WARMUP', '1') == '1'
 
-retriever_personnel = db_personnel.as_retriever(search_kwargs={'k': 1})
-retriever_others = db_others.as_retriever(search_kwargs={'k': 2})
-retriever_library = db_library.as_retriever(search_kwargs={'k': 6})
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# The model is only built when first needed, so importing this module is cheap.
+# Query vectors are cached for every retriever, since they share this instance.
+embeddings = CachedEmbeddings(
+    LazyEmbeddings(lambda: HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, model_kwargs={'device': 'cpu'})),
+    model_name=EMBEDDING_MODEL
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,17 +33,38 @@ logger = logging.getLogger(__name__)
 
 DB_FAISS_SQL_UNIFIED_PATH = '/home/anupam/SuperVaani/models/vectorstore_sql_unified/db_faiss/'
 
-def retrieve_with_metadata(query: str, db_path: str, k: int = 3) -> List[Document]:
+# Every index is loaded once and reloaded only when its files change
+vectorstores = VectorStoreRegistry(embeddings)
+vectorstores.register("personnel", DB_FAISS_PATH_PERSONNEL)
+vectorstores.register("others", DB_FAISS_PATH_OTHERS)
+vectorstores.register("library", DB_FAISS_PATH_LIBRARY)
+vectorstores.register("sql_unified", DB_FAISS_SQL_UNIFIED_PATH)
+
+# Denormalised faculty records, rebuilt when the faculty tables change
+faculty_index = FacultyIndex(sql_engine)
+
+if INDEX_WARMUP:
+    vectorstores.warm_up_in_background()
+    if sql_engine.configured:
+        threading.Thread(target=faculty_index.warm_up, name="faculty-index-warmup", daemon=True).start()
+    else:
+        logger.warning("SUPERVAANI_SQL_DATABASE_URI is not set; faculty questions cannot be answered")
+
+# Number of documents each retriever returns
+RETRIEVER_K = {"personnel": 1, "others": 2, "library": 6}
+
+def get_retriever(name, k=None):
     """
-    Retrieve documents from a FAISS DB and return new Document objects
-    whose page_content combines both text and metadata.
+    Get a retriever over the current copy of a registered vectorstore.
     """
-    vectorstore = FAISS.load_local(
-        db_path,
-        embeddings,
-        allow_dangerous_deserialization=True
-    )
-    retriever = vectorstore.as_retriever(search_kwargs={"k": k})
+    return vectorstores.get(name).as_retriever(search_kwargs={'k': k or RETRIEVER_K[name]})
+
+def retrieve_with_metadata(query: str, store: str, k: int = 3) -> List[Document]:
+    """
+    Retrieve documents from a registered FAISS DB and return new Document
+    objects whose page_content combines both text and metadata.
+    """
+    retriever = get_retriever(store, k)
 
     # Retrieve original documents
     docs = retriever.invoke(query)
@@ -72,9 +99,10 @@ def retrieve(state):
     """
     print("---RETRIEVE---")
     question = state["question"]
+    query = state.get("standalone_query") or question
     # Retrieval
 
-    documents = retriever_personnel.invoke(question)
+    documents = get_retriever("personnel").invoke(query)
 #    documents = retriever_others.invoke(question) +  documents
     # Load the database
     return {"documents": documents, "question": question}
@@ -91,8 +119,9 @@ def retrieve_other(state):
     """
     print("---RETRIEVE OTHERS---")
     question = state["question"]
+    query = state.get("standalone_query") or question
     # Retrieval
-    documents = retriever_others.invoke(question)
+    documents = get_retriever("others").invoke(query)
     # Load the database
     return {"documents": documents, "question": question}
 
@@ -107,34 +136,21 @@ def retrieve_sql(state):
     Returns:
         state (dict): New key added to state, documents, that contains retrieved documents from sql
     """
-    # print("---RETRIEVE SQL---")
-    print("HELLOOOOOOOO WE IN SQL")
+    print("---RETRIEVE SQL---")
     question = state["question"]
-    print(f"---question -- {question}")
-    documents = [] 
-    logger.error("sql step 2 are we here?")
-    # Load the database
-    db = load_db()
-    
-    # Create the SQL LLM chain
-    llm_chain = chain_create()
-
-    db = load_db()
-    logger.error("sql step 3 are we here?")
-    # Create the LLM chain
-    llm_chain = chain_create()
-    logger.error("sql step 4 are we here?")
-    sql_docs = sql_infer(db, llm_chain, question)
-    if sql_docs is not None:
-        doc = Document(page_content=sql_docs, metadata={"source": "sql"})
-        print(doc)
-        documents.append(doc)
-    logger.error("sql step 5 are we here?")
+    query = state.get("standalone_query") or question
+    # Questions that name a professor or a specific topic are answered from memory
+    documents = faculty_index.lookup(query)
+    if not documents:
+        # The database and chain are built once and shared by all requests;
+        # failed SQL is repaired there within a bounded number of attempts
+        sql_docs = sql_engine.infer(query)
+        if sql_docs is not None:
+            documents.append(Document(page_content=sql_docs, metadata={"source": "sql"}))
     ## The portion for the sql unified vectorstore
-    sql_unified_docs = retrieve_with_metadata(question, DB_FAISS_SQL_UNIFIED_PATH, k=2)
+    sql_unified_docs = retrieve_with_metadata(query, "sql_unified", k=2)
     documents.extend(sql_unified_docs)
-    logger.error("step 6 we are in sql brother")
-    logger.error(f"{documents}")
+    logger.debug(f"Retrieved {len(documents)} faculty document(s) for: {query}")
 
     return {"documents": documents, "question": question}
 
@@ -152,6 +168,7 @@ def retrieve_library(state):
     """
     print("---RETRIEVE LIBRARY---")
     question = state["question"]
+    query = state.get("standalone_query") or question
     # Retrieval logic for books and libraries
-    documents = retriever_library.invoke(question)
+    documents = get_retriever("library").invoke(query)
     return {"documents": documents, "question": question}
@@ -1,34 +1,50 @@
+import logging
 from models.research.prompts import prompt_question_router
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_ollama import ChatOllama
+from models.research.retrieval import embeddings
+from models.research.local_router import CentroidRouter
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 llm = ChatOllama(model="llama3.1:8b", temperature=0)
 question_router = prompt_question_router | llm | JsonOutputParser()
 
-# Define a conditional edge to decide whether to continue or end the workflow for sql
-def route_sql(state):
-    """
-    Route question to back to retrieve_sql or to grade_documents.
+# Embedding classifier tried before the LLM router
+local_router = CentroidRouter(embeddings)
 
-    Args:
-        state (dict): The current graph state
+# Next node for each datasource label
+DATASOURCE_ROUTES = {
+    "others": "retrieve_other",
+    "faculty": "faculty",
+    "founder": "founder",
+    "retrieve_library": "retrieve_library",
+    "library": "retrieve_library",
+}
+
+def llm_datasource(query):
+    """
+    Ask the LLM router for a datasource label.
 
     Returns:
-        str: Next node to call
+        str: The label, or None if the reply could not be parsed
     """
-    messages = state["documents"]
-    last_message = messages[-1]
-    # If there is a tool call, then we finish
-    if last_message.page_content.startswith("Error:"):
-        return "retrieve_sql"
-    else:
-        return "generate"
+    try:
+        source = question_router.invoke({"question": query})
+        logger.debug(f"LLM router reply: {source}")
+        return source.get("datasource") if isinstance(source, dict) else None
+    except Exception as e:
+        logger.warning(f"LLM router failed: {e}")
+        return None
 
 ### Conditional edge
 def route_question(state):
     """
-    Route question to web search or RAG.
+    Route question to the datasource that can answer it.
+
+    An embedding nearest-centroid classifier decides confident cases; the
+    LLM router is only asked when it is unsure.
 
     Args:
         state (dict): The current graph state
@@ -38,16 +54,20 @@ def route_question(state):
     """
 
     print("---ROUTE QUESTION---")
-    question = state["question"]
-    print(question)
-    source = question_router.invoke({"question": question})
-    print(source)
-
-    if source["datasource"] == "others":
-        return "retrieve_other"
-    elif source["datasource"] == "faculty":
-        return "faculty"
-    elif source["datasource"] == "founder":
-        return "founder"
-    else:
-        return "retrieve_library"
+    query = state.get("standalone_query") or state["question"]
+    logger.debug(f"Routing query: {query}")
+
+    # Confident local predictions skip the LLM call
+    try:
+        datasource, scores = local_router.classify(query)
+        logger.debug(f"Router centroid scores: {scores}")
+    except Exception as e:
+        logger.warning(f"Local router failed: {e}")
+        datasource, scores = None, {}
+    if datasource is None:
+        datasource = llm_datasource(query)
+    if datasource not in DATASOURCE_ROUTES:
+        # Unusable LLM reply; the best local guess beats failing the request
+        datasource = next(iter(scores), "others")
+    logger.debug(f"Routing to {datasource}")
+    return DATASOURCE_ROUTES[datasource]
@@ -0,0 +1,182 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from models.research.embedding_cache import normalize_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cache limits, overridable through the environment. Results longer than
+# SQL_RESULT_MAX_CHARS are not cached, which bounds the memory per entry.
+SQL_PLAN_CACHE_SIZE = int(os.environ.get('SUPERVAANI_SQL_PLAN_CACHE_SIZE', 2000))
+SQL_RESULT_CACHE_SIZE = int(os.environ.get('SUPERVAANI_SQL_RESULT_CACHE_SIZE', 500))
+SQL_RESULT_MAX_CHARS = int(os.environ.get('SUPERVAANI_SQL_RESULT_MAX_CHARS', 20000))
+SQL_CACHE_TTL = int(os.environ.get('SUPERVAANI_SQL_CACHE_TTL', 24 * 60 * 60))
+
+# Seconds between checks of the data version stamp
+SQL_VERSION_CHECK_INTERVAL = float(os.environ.get('SUPERVAANI_SQL_VERSION_CHECK_INTERVAL', 30))
+
+# Tables the generated queries read
+FACULTY_TABLES = ("professors", "expertise", "professor_expertise", "courses_m_2025", "course_professors")
+
+def normalize_question(question):
+    """
+    Normalise a question so trivially different spellings share a plan.
+    """
+    return normalize_query(question).rstrip("?.! ")
+
+def data_version_query(dialect, tables=FACULTY_TABLES):
+    """
+    Get a query whose result changes whenever the faculty tables change.
+
+    MySQL checksums the tables' contents. Other databases, such as the
+    SQLite stand-in, use row counts, so in-place edits there are only
+    picked up by the cache TTL.
+    """
+    if dialect == "mysql":
+        return f"CHECKSUM TABLE {', '.join(tables)}"
+    return "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table})" for table in tables)
+
+class LRU:
+    """
+    Bounded mapping with per-entry creation times.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, key, now, ttl):
+        item = self.entries.get(key)
+        if item is None:
+            return None, False
+        value, created = item
+        if now - created > ttl:
+            del self.entries[key]
+            return None, True
+        self.entries.move_to_end(key)
+        return value, False
+
+    def put(self, key, value, now):
+        self.entries[key] = (value, now)
+        self.entries.move_to_end(key)
+        evicted = 0
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+class SQLCache:
+    """
+    Two-level cache for text-to-SQL.
+
+    The plan level maps a normalised question to SQL that ran without
+    error, so repeated questions skip the LLM. The result level maps SQL
+    text to its result, so repeated queries, including different questions
+    the LLM turned into the same SQL, skip the database. Both levels are
+    cleared when the data version stamp of the faculty tables changes,
+    which is checked at most every ``check_interval`` seconds.
+    """
+
+    def __init__(self, plan_size=SQL_PLAN_CACHE_SIZE, result_size=SQL_RESULT_CACHE_SIZE,
+                 result_max_chars=SQL_RESULT_MAX_CHARS, ttl=SQL_CACHE_TTL,
+                 check_interval=SQL_VERSION_CHECK_INTERVAL, clock=time.monotonic):
+        self.result_max_chars = result_max_chars
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._clock = clock
+        self._plans = LRU(plan_size)
+        self._results = LRU(result_size)
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        self.counts = {name: 0 for name in (
+            'plan_hits', 'plan_misses', 'result_hits', 'result_misses',
+            'evictions', 'expirations', 'invalidations'
+        )}
+
+    def check_version(self, db):
+        """
+        Clear the cache if the faculty tables changed since the last check.
+
+        Returns:
+            bool: False if the version could not be read; the cache is not used then
+        """
+        now = self._clock()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._version is not None
+            self._checked_at = now
+        try:
+            version = db.run(data_version_query(db.dialect))
+        except Exception as e:
+            logger.warning(f"Could not read the faculty data version, SQL cache bypassed: {e}")
+            version = None
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self.counts['invalidations'] += 1
+                    logger.info("Faculty tables changed, cleared the SQL cache")
+                self._plans.entries.clear()
+                self._results.entries.clear()
+                self._version = version
+        return version is not None
+
+    @property
+    def version(self):
+        """
+        The data version stamp seen at the last check, or None if it could not be read.
+        """
+        with self._lock:
+            return self._version
+
+    def get_plan(self, question):
+        return self._get(self._plans, normalize_question(question), 'plan')
+
+    def put_plan(self, question, sql):
+        self._put(self._plans, normalize_question(question), sql)
+
+    def get_result(self, sql):
+        return self._get(self._results, sql.strip(), 'result')
+
+    def put_result(self, sql, result):
+        if result is not None and len(str(result)) <= self.result_max_chars:
+            self._put(self._results, sql.strip(), result)
+
+    def _get(self, level, key, name):
+        with self._lock:
+            value, expired = level.get(key, self._clock(), self.ttl)
+            self.counts['expirations'] += expired
+            self.counts[f'{name}_hits' if value is not None else f'{name}_misses'] += 1
+            return value
+
+    def _put(self, level, key, value):
+        with self._lock:
+            self.counts['evictions'] += level.put(key, value, self._clock())
+
+    def clear(self):
+        with self._lock:
+            self._plans.entries.clear()
+            self._results.entries.clear()
+
+    def stats(self):
+        """
+        Get cache metrics.
+
+        Returns:
+            dict: Hit, miss, eviction, expiration and invalidation counts and sizes
+        """
+        with self._lock:
+            stats = dict(self.counts)
+            for name in ('plan', 'result'):
+                lookups = stats[f'{name}_hits'] + stats[f'{name}_misses']
+                stats[f'{name}_hit_rate'] = round(stats[f'{name}_hits'] / lookups, 4) if lookups else 0.0
+            stats.update({
+                'plans': len(self._plans.entries),
+                'results': len(self._results.entries),
+                'max_plans': self._plans.max_size,
+                'max_results': self._results.max_size
+            })
+            return stats
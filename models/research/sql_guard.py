@@ -0,0 +1,221 @@
+import os
+import re
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Limits on generated SQL, overridable through the environment: rows
+# fetched, wall-clock time per query, and the size of the result text
+# handed to the generator (at roughly 4 characters per token)
+SQL_MAX_ROWS = int(os.environ.get('SUPERVAANI_SQL_MAX_ROWS', 200))
+SQL_TIMEOUT_MS = int(os.environ.get('SUPERVAANI_SQL_TIMEOUT_MS', 5000))
+SQL_RESULT_TOKEN_BUDGET = int(os.environ.get('SUPERVAANI_SQL_RESULT_TOKEN_BUDGET', 1500))
+CHARS_PER_TOKEN = 4
+
+# Statements and functions generated SQL may never use, even inside a SELECT.
+# REPLACE is left out: as a statement it fails the SELECT check, and
+# inside a SELECT it is the string function
+FORBIDDEN = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|UPSERT|DROP|ALTER|CREATE|TRUNCATE|RENAME|GRANT|REVOKE|"
+    r"ATTACH|DETACH|PRAGMA|VACUUM|CALL|EXEC|EXECUTE|PREPARE|DO|HANDLER|LOAD|LOCK|UNLOCK|SET|USE|"
+    r"INTO|OUTFILE|DUMPFILE|SLEEP|BENCHMARK|GET_LOCK|LOAD_FILE|SHUTDOWN|KILL)\b",
+    re.IGNORECASE
+)
+TRAILING_LIMIT = re.compile(r"\bLIMIT\s+(\d+)\s*(?:,\s*(\d+)|\s+OFFSET\s+\d+)?\s*$", re.IGNORECASE)
+
+class UnsafeSQLError(ValueError):
+    """
+    Generated SQL that is not a single read-only query.
+    """
+
+class SQLTimeoutError(RuntimeError):
+    """
+    A query that ran past its time budget.
+    """
+
+def scan_sql(sql):
+    """
+    Blank out comments and quoted text so keywords can be checked safely.
+
+    Returns:
+        tuple: (sql without comments, the same with string literals and
+        quoted identifiers blanked too); both have the length of sql
+    """
+    clean, masked = list(sql), list(sql)
+    i, n = 0, len(sql)
+    while i < n:
+        char = sql[i]
+        if sql.startswith("--", i) or char == "#":
+            end = sql.find("\n", i)
+            end = n if end < 0 else end
+            clean[i:end] = masked[i:end] = " " * (end - i)
+            i = end
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            clean[i:end] = masked[i:end] = " " * (end - i)
+            i = end
+        elif char in "'\"`":
+            j = i + 1
+            while j < n:
+                if sql[j] == "\\" and char != "`":
+                    j += 2
+                    continue
+                if sql[j] == char:
+                    # A doubled quote is an escaped quote
+                    if j + 1 < n and sql[j + 1] == char:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            end = min(j + 1, n)
+            masked[i + 1:end - 1] = " " * max(0, end - i - 2)
+            i = end
+        else:
+            i += 1
+    return "".join(clean), "".join(masked)
+
+def validate_sql(sql):
+    """
+    Check that generated SQL is one read-only SELECT statement.
+
+    Returns:
+        tuple: (statement without comments or trailing semicolons, the same with quoted text blanked)
+
+    Raises:
+        UnsafeSQLError: If the SQL is empty, has several statements or can modify anything
+    """
+    clean, masked = scan_sql(sql)
+    end = len(masked.rstrip().rstrip(";").rstrip())
+    start = len(masked) - len(masked.lstrip())
+    clean, masked = clean[start:end], masked[start:end]
+    if not masked.strip():
+        raise UnsafeSQLError("empty query")
+    if ";" in masked:
+        raise UnsafeSQLError("more than one statement")
+    first = masked.split(None, 1)[0].upper()
+    if first not in ("SELECT", "WITH"):
+        raise UnsafeSQLError(f"only SELECT queries are allowed, got {first}")
+    forbidden = FORBIDDEN.search(masked)
+    if forbidden:
+        raise UnsafeSQLError(f"{forbidden.group(1).upper()} is not allowed")
+    return clean, masked
+
+def limit_rows(sql, masked, max_rows=SQL_MAX_ROWS):
+    """
+    Make a validated query return at most max_rows + 1 rows.
+
+    One extra row is fetched so callers can tell the result was cut. A
+    query without a top-level LIMIT gets one appended; a larger LIMIT is
+    wrapped in an outer query.
+    """
+    trailing = TRAILING_LIMIT.search(masked)
+    if trailing and masked[:trailing.start()].count("(") == masked[:trailing.start()].count(")"):
+        count = int(trailing.group(2) or trailing.group(1))
+        if count <= max_rows:
+            return sql
+        return f"SELECT * FROM ({sql}) AS limited_result LIMIT {max_rows + 1}"
+    return f"{sql} LIMIT {max_rows + 1}"
+
+def prepare_sql(sql, max_rows=SQL_MAX_ROWS):
+    """
+    Validate generated SQL and inject the row limit.
+
+    Returns:
+        str: The query to run
+
+    Raises:
+        UnsafeSQLError: If the SQL is not a single read-only SELECT
+    """
+    clean, masked = validate_sql(sql)
+    return limit_rows(clean, masked, max_rows)
+
+def _start_budget(conn, dialect, timeout_ms):
+    # Read-only and time limits per dialect, undone by _end_budget
+    if dialect == "mysql":
+        conn.exec_driver_sql(f"SET SESSION MAX_EXECUTION_TIME = {int(timeout_ms)}")
+        conn.exec_driver_sql("SET SESSION TRANSACTION READ ONLY")
+    elif dialect == "postgresql":
+        conn.exec_driver_sql(f"SET statement_timeout = {int(timeout_ms)}")
+        conn.exec_driver_sql("SET default_transaction_read_only = on")
+    elif dialect == "sqlite":
+        raw = conn.connection.driver_connection
+        deadline = time.monotonic() + timeout_ms / 1000
+        raw.execute("PRAGMA query_only = ON")
+        raw.set_progress_handler(lambda: int(time.monotonic() > deadline), 1000)
+
+def _end_budget(conn, dialect):
+    if dialect == "mysql":
+        conn.exec_driver_sql("SET SESSION MAX_EXECUTION_TIME = 0")
+        conn.exec_driver_sql("SET SESSION TRANSACTION READ WRITE")
+    elif dialect == "postgresql":
+        conn.exec_driver_sql("RESET statement_timeout")
+        conn.exec_driver_sql("RESET default_transaction_read_only")
+    elif dialect == "sqlite":
+        raw = conn.connection.driver_connection
+        raw.set_progress_handler(None, 0)
+        raw.execute("PRAGMA query_only = OFF")
+
+def run_guarded(engine, sql, max_rows=SQL_MAX_ROWS, timeout_ms=SQL_TIMEOUT_MS):
+    """
+    Validate and run generated SQL within the row and time budgets.
+
+    The query runs read-only where the database supports it and is
+    stopped by the database once it exceeds timeout_ms.
+
+    Returns:
+        tuple: (rows, whether more rows were cut off)
+
+    Raises:
+        UnsafeSQLError: If the SQL is not a single read-only SELECT
+        SQLTimeoutError: If the query ran out of time
+    """
+    query = prepare_sql(sql, max_rows)
+    dialect = engine.dialect.name
+    started = time.monotonic()
+    with engine.connect() as conn:
+        _start_budget(conn, dialect, timeout_ms)
+        try:
+            rows = [tuple(row) for row in conn.exec_driver_sql(query).fetchmany(max_rows + 1)]
+        except Exception as e:
+            if (time.monotonic() - started) * 1000 >= timeout_ms:
+                raise SQLTimeoutError(f"query exceeded the {timeout_ms} ms time budget") from e
+            raise
+        finally:
+            try:
+                conn.rollback()
+            finally:
+                try:
+                    _end_budget(conn, dialect)
+                except Exception as e:
+                    # Never hand a read-only, time-limited connection back to the pool
+                    logger.warning(f"Discarding SQL connection that could not be reset: {e}")
+                    conn.invalidate()
+    return rows[:max_rows], len(rows) > max_rows
+
+def format_rows(rows, truncated=False, token_budget=SQL_RESULT_TOKEN_BUDGET):
+    """
+    Render result rows for the prompt, cut to a token budget.
+
+    Returns:
+        str: The rows as a list of tuples, with a note when rows were left out
+    """
+    budget = token_budget * CHARS_PER_TOKEN
+    text = str(rows)
+    shown = len(rows)
+    if len(text) > budget:
+        # Keep whole rows that fit
+        parts, used = [], 2
+        for row in rows:
+            part = repr(row)
+            if used + len(part) + 2 > budget:
+                break
+            parts.append(part)
+            used += len(part) + 2
+        shown = len(parts)
+        text = "[" + ", ".join(parts) + "]"
+    if shown < len(rows) or truncated:
+        text += f"\n(showing {shown} of {'more than ' if truncated else ''}{len(rows)} rows)"
+    return text
@@ -0,0 +1,95 @@
+"""
+Concurrent load test for the chat endpoint.
+
+Sends questions to POST /api/<user>/supervaani from many simulated users
+at once and reports throughput, latency percentiles and errors, and with
+--stream the time to the first token event (TTFT). Run it once against
+the Flask server and once against the ASGI app to compare them, e.g.
+gunicorn "api.v1.app:app" against uvicorn api.v1.asgi:app.
+
+Usage:
+    python -m models.research.testing_QA.chat_load_test http://localhost:5000 --users 50 --requests 4 [--stream]
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+QUESTIONS = [
+    "What are the hostel facilities?",
+    "Who teaches machine learning?",
+    "How do I apply for a scholarship?",
+    "What are the library timings?",
+    "Who founded the university?",
+]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def ask(client, url, question, stream):
+    payload = {"user_message": question, "stream": stream}
+    started = time.perf_counter()
+    if stream:
+        first_token = None
+        async with client.stream("POST", url, json=payload) as response:
+            async for line in response.aiter_lines():
+                # The "start" event is sent before any work; time the first token
+                if first_token is None and line.strip() == "event: token":
+                    first_token = time.perf_counter() - started
+            ok = response.status_code == 200
+    else:
+        response = await client.post(url, json=payload)
+        first_token = None
+        ok = response.status_code == 200
+    return ok, time.perf_counter() - started, first_token
+
+
+async def simulate_user(client, base_url, user, requests, stream, results):
+    url = f"{base_url}/api/load-test-{user}/supervaani"
+    for r in range(requests):
+        try:
+            results.append(await ask(client, url, QUESTIONS[(user + r) % len(QUESTIONS)], stream))
+        except httpx.HTTPError:
+            results.append((False, None, None))
+
+
+async def run(base_url, users, requests, stream, timeout):
+    results = []
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(simulate_user(client, base_url, u, requests, stream, results) for u in range(users)))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base_url")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=4, help="questions per user, asked one after another")
+    parser.add_argument("--stream", action="store_true", help="request server-sent events")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    results, elapsed = asyncio.run(run(args.base_url.rstrip("/"), args.users, args.requests, args.stream, args.timeout))
+    latencies = [seconds * 1000 for ok, seconds, _ in results if ok]
+    first_tokens = [seconds * 1000 for ok, _, seconds in results if ok and seconds is not None]
+    errors = sum(not ok for ok, _, _ in results)
+
+    print(f"{len(results)} requests from {args.users} users in {elapsed:.1f} s "
+          f"({len(latencies) / elapsed:.2f} successful req/s), {errors} errors")
+    print(f"Latency ms: p50 {percentile(latencies, 0.5):.0f}, p95 {percentile(latencies, 0.95):.0f}, "
+          f"p99 {percentile(latencies, 0.99):.0f}")
+    if first_tokens:
+        print(f"TTFT ms: p50 {percentile(first_tokens, 0.5):.0f}, p95 {percentile(first_tokens, 0.95):.0f}")
+
+
+if __name__ == "__main__":
+    main()
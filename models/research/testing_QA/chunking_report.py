@@ -0,0 +1,82 @@
+"""
+Compare character-split and row-aware chunking of Q&A spreadsheets.
+
+Builds one index with the old UnstructuredExcelLoader + 1000-character
+splits and one with a document per Q&A row, from the same directory of
+spreadsheets, and reports chunk count, index size, build time and the
+retrieval hit-rate on the QBank questions. A question is a hit when its
+expected answer appears in one of the top-k retrieved chunks.
+
+Usage:
+    python -m models.research.testing_QA.chunking_report others_data/ QBank_Final_1Dec2024.xlsx [--k 2]
+"""
+import os
+import time
+import argparse
+import tempfile
+import pandas as pd
+
+from langchain_community.vectorstores import FAISS
+from langchain_community.document_loaders import UnstructuredExcelLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from models import ingest_others_data as ingest
+
+
+def character_chunks(data_path, names):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=ingest.CHUNK_SIZE, chunk_overlap=ingest.CHUNK_OVERLAP)
+    documents = []
+    for name in names:
+        documents.extend(UnstructuredExcelLoader(os.path.join(data_path, name)).load())
+    return splitter.split_documents(documents)
+
+
+def row_chunks(data_path, names):
+    rows = {}
+    for name in names:
+        for doc in ingest.load_qa_rows(name, data_path) or []:
+            rows.setdefault(ingest.row_id(doc.metadata['question'], doc.metadata['answer']), doc)
+    return list(rows.values())
+
+
+def index_bytes(db):
+    with tempfile.TemporaryDirectory() as path:
+        db.save_local(path)
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def hit_rate(db, qa_pairs, k):
+    hits = 0
+    for question, answer in qa_pairs:
+        expected = ingest.normalize_cell(answer).lower()
+        retrieved = db.similarity_search(question, k=k)
+        hits += any(expected in ingest.normalize_cell(doc.page_content).lower() for doc in retrieved)
+    return hits / len(qa_pairs) if qa_pairs else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_path")
+    parser.add_argument("qbank", nargs="?", default="QBank_Final_1Dec2024.xlsx")
+    parser.add_argument("--k", type=int, default=2)
+    args = parser.parse_args()
+
+    names = sorted(ingest.list_data_files(args.data_path))
+    df = pd.read_excel(args.qbank)
+    qa_pairs = [(str(q), str(a)) for q, a in zip(df['Questions'], df['Answer'])]
+    embeddings = HuggingFaceEmbeddings(model_name=ingest.EMBEDDING_MODEL, model_kwargs={'device': 'cpu'})
+
+    print(f"{'chunking':<12}{'chunks':>8}{'chars':>12}{'index KB':>10}{'build s':>9}{'hit@' + str(args.k):>8}")
+    for label, chunker in (("characters", character_chunks), ("rows", row_chunks)):
+        started = time.perf_counter()
+        chunks = chunker(args.data_path, names)
+        db = FAISS.from_documents(chunks, embeddings)
+        build_seconds = time.perf_counter() - started
+        chars = sum(len(doc.page_content) for doc in chunks)
+        print(f"{label:<12}{len(chunks):>8}{chars:>12}{index_bytes(db) / 1024:>10.0f}"
+              f"{build_seconds:>9.1f}{hit_rate(db, qa_pairs, args.k):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
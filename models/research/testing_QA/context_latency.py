@@ -0,0 +1,84 @@
+"""
+Per-turn cost of building the chat context as a conversation grows.
+
+Writes turns to one conversation in a temporary SQLite file and, at each
+checkpoint, times building the history passed to the model two ways:
+"full" reads and formats the whole transcript, as the handler did before
+the context cache; "cached" goes through ContextCache, as start_turn and
+finish_turn do now, including the turn's commit. The cached cost and
+size should stay flat.
+
+Usage:
+    python -m models.research.testing_QA.context_latency --turns 2000 --samples 20
+"""
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+# database.py migrates SUPERVAANI_DB_PATH on import; keep it off the real store
+os.environ.setdefault('SUPERVAANI_DB_PATH', os.path.join(tempfile.mkdtemp(prefix="supervaani-bench-"), "supervaani.db"))
+
+from database import db_pool, CONVERSATION_HISTORY
+from idgen import new_id
+from chat_turn import ChatTurn
+from conversation_context import ContextCache, format_message, estimate_tokens
+
+
+def full_history(conversation_id):
+    with db_pool.connection() as conn:
+        rows = conn.execute(CONVERSATION_HISTORY, (conversation_id,)).fetchall()
+    return "".join(format_message(row) for row in rows)
+
+
+def cached_history(cache, conversation_id):
+    # One turn: read the context, then record the committed messages on top
+    history = cache.get(conversation_id)
+    text = history.render()
+    turn = ChatTurn(conversation_id, "user-1")
+    turn.add_message(new_id("msg"), "user", "Who teaches the machine learning course this term?")
+    turn.add_message(new_id("msg"), "assistant", "The course is taught by ... " * 20)
+    turn.commit()
+    cache.extend(conversation_id, history, turn.messages)
+    return text
+
+
+def timed(func, samples):
+    started = time.perf_counter()
+    for _ in range(samples):
+        result = func()
+    return (time.perf_counter() - started) / samples * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+
+    # ChatTurn logs every commit at INFO, which would dominate the timings
+    logging.disable(logging.INFO)
+    cache = ContextCache()
+    conversation_id = new_id("conv")
+    turn = ChatTurn(conversation_id, "user-1")
+    turn.create_conversation("Benchmark")
+    turn.commit()
+
+    checkpoints = sorted({c for c in (10, 100, 500, 1000, 2000, args.turns) if c <= args.turns})
+    print(f"{'turns':>6} {'full ms':>9} {'full tokens':>12} {'cached ms':>10} {'cached tokens':>14}")
+    turns = 0
+    for checkpoint in checkpoints:
+        # Each cached sample writes a turn, so fill up to just short of the checkpoint
+        while turns < checkpoint - args.samples:
+            cached_history(cache, conversation_id)
+            turns += 1
+        cached_ms, cached_text = timed(lambda: cached_history(cache, conversation_id), args.samples)
+        turns += args.samples
+        full_ms, full_text = timed(lambda: full_history(conversation_id), args.samples)
+        print(f"{turns:>6} {full_ms:>9.2f} {estimate_tokens(full_text):>12,} "
+              f"{cached_ms:>10.2f} {estimate_tokens(cached_text):>14,}")
+
+
+if __name__ == "__main__":
+    main()
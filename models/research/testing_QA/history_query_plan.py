@@ -0,0 +1,89 @@
+"""
+Query plans and latency of the conversation history reads.
+
+Builds a conversation store of synthetic users, conversations and
+messages in a temporary SQLite file with the current migrations, then
+prints EXPLAIN QUERY PLAN and p50/p95 latency of the history and
+conversation-list queries the API runs. Both should search their index
+(idx_messages_conversation_seq and the covering
+idx_conversations_user_updated) without a temp B-tree sort.
+
+Usage:
+    python -m models.research.testing_QA.history_query_plan --users 1000 --conversations 10 --messages 20
+"""
+import os
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+from database import migrate, CONVERSATION_HISTORY, USER_CONVERSATIONS
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def populate(conn, users, conversations, messages):
+    conn.execute("BEGIN")
+    for u in range(users):
+        for c in range(conversations):
+            conversation_id = f"c-{u}-{c}"
+            conn.execute("INSERT INTO conversations (id, user_id, title, updated_at) VALUES (?, ?, ?, ?)",
+                         (conversation_id, f"user-{u}", f"Conversation {c}", f"2024-01-{1 + c % 28:02d} 10:00:00"))
+            conn.executemany(
+                "INSERT INTO messages (id, conversation_id, role, content, seq) VALUES (?, ?, ?, ?, ?)",
+                [(f"m-{u}-{c}-{m}", conversation_id, "user" if m % 2 == 0 else "assistant",
+                  "message text " * 20, m + 1) for m in range(messages)]
+            )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def plan(conn, sql, params):
+    return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def timed(conn, sql, params_list):
+    latencies = []
+    for params in params_list:
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as root:
+        conn = sqlite3.connect(os.path.join(root, "supervaani.db"), isolation_level=None)
+        migrate(conn)
+        populate(conn, args.users, args.conversations, args.messages)
+
+        queries = (
+            ("history", CONVERSATION_HISTORY,
+             [(f"c-{rng.randrange(args.users)}-{rng.randrange(args.conversations)}",) for _ in range(args.samples)]),
+            ("conversations", USER_CONVERSATIONS,
+             [(f"user-{rng.randrange(args.users)}", 10, 0) for _ in range(args.samples)]),
+        )
+        print(f"{args.users} users x {args.conversations} conversations x {args.messages} messages\n")
+        for name, sql, params_list in queries:
+            print(f"{name}:")
+            for detail in plan(conn, sql, params_list[0]):
+                print(f"  {detail}")
+            latencies = timed(conn, sql, params_list)
+            print(f"  p50 {percentile(latencies, 0.5):.3f} ms, p95 {percentile(latencies, 0.95):.3f} ms\n")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Throughput benchmark for the spreadsheet ingestion pipeline.
+
+Writes a synthetic Q&A corpus of .xlsx files to a temporary directory,
+builds an index from it with ingest_others_data.create_vector_db and
+reports chunks per second. Pipeline settings are passed through the same
+environment variables the ingester reads.
+
+Usage:
+    python -m models.research.testing_QA.ingest_benchmark --files 50 --rows 400 --workers 4 --batch-size 64 --threads 4
+"""
+import os
+import random
+import argparse
+import tempfile
+
+from openpyxl import Workbook
+
+TOPICS = ["admissions", "hostel", "scholarships", "library", "exams", "courses", "clubs", "transport"]
+
+
+def write_corpus(path, files, rows, seed=0):
+    rng = random.Random(seed)
+    for f in range(files):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Questions", "Answers"])
+        for r in range(rows):
+            topic = rng.choice(TOPICS)
+            sheet.append([
+                f"Question {f}-{r} about {topic}: what is the policy for {topic} in term {rng.randint(1, 8)}?",
+                " ".join(f"The {topic} office handles case {rng.randint(1, 10**6)}." for _ in range(rng.randint(3, 12)))
+            ])
+        workbook.save(os.path.join(path, f"qa_{f:04d}.xlsx"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    # The ingester reads its settings at import
+    for name, value in (("SUPERVAANI_INGEST_WORKERS", args.workers),
+                        ("SUPERVAANI_EMBED_BATCH_SIZE", args.batch_size),
+                        ("SUPERVAANI_EMBED_THREADS", args.threads)):
+        if value is not None:
+            os.environ[name] = str(value)
+    from models import ingest_others_data as ingest
+
+    with tempfile.TemporaryDirectory() as root:
+        data_path = os.path.join(root, "data")
+        os.makedirs(data_path)
+        write_corpus(data_path, args.files, args.rows)
+        summary = ingest.create_vector_db(full=True, data_path=data_path,
+                                          db_path=os.path.join(root, "index", "db_faiss"))
+
+    print(f"\nFiles: {args.files} x {args.rows} rows")
+    print(f"Workers: {ingest.INGEST_WORKERS}, batch size: {ingest.EMBED_BATCH_SIZE}, "
+          f"torch threads: {ingest.EMBED_THREADS or 'default'}")
+    print(f"Chunks: {summary['chunks_added']}")
+    print(f"Parse + embed + index: {summary['timings']['embed_seconds']} s, "
+          f"{summary['chunks_per_second']} chunks/s")
+    print(f"Model load: {summary['timings']['load_seconds']} s, save: {summary['timings']['save_seconds']} s")
+
+
+if __name__ == "__main__":
+    main()
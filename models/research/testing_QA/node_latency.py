@@ -0,0 +1,83 @@
+"""
+Per-node latency of the workflow as the conversation history grows.
+
+Runs a synthetic conversation of follow-up questions through the shared
+workflow and times every node from its streamed update. "transcript"
+sends the whole formatted conversation as the question, as the chat
+handler did before condense_question, so routing and retrieval see the
+full history; "standalone" sends the current question with the
+token-budgeted history, as start_turn does now. The answer cache is
+turned off so every turn runs the full graph. Needs the full model stack:
+Ollama, the FAISS indexes and the faculty database.
+
+Usage:
+    python -m models.research.testing_QA.node_latency --turns 2,8,32
+"""
+import os
+import time
+import argparse
+
+# Every turn should reach retrieval and generation
+os.environ['SUPERVAANI_ANSWER_CACHE_SIZE'] = '0'
+
+from conversation_context import ConversationContext, format_message, estimate_tokens
+from models.research.main import get_app
+
+QUESTIONS = [
+    "Who teaches machine learning at Plaksha?",
+    "What other courses does he teach?",
+    "What is their email?",
+    "Which professors work on robotics?",
+    "What are the library timings?",
+    "Who founded Plaksha?",
+]
+ANSWER = "Here is what I found in the records. " * 15
+
+
+def conversation(turns):
+    messages = []
+    for n in range(turns):
+        messages.append({'role': "user", 'content': QUESTIONS[n % len(QUESTIONS)]})
+        messages.append({'role': "assistant", 'content': ANSWER})
+    return messages
+
+
+def inputs(mode, messages, question):
+    if mode == "transcript":
+        transcript = "".join(format_message(m) for m in messages)
+        return {"question": f"Previous conversation:\n{transcript}\n\nCurrent question: {question}", "history": ""}
+    return {"question": question, "history": ConversationContext().extended(messages).render()}
+
+
+def node_timings(app, state):
+    # Nodes run one after another, so each update marks the end of one node
+    timings = []
+    started = last = time.perf_counter()
+    for update in app.stream(state, stream_mode="updates"):
+        now = time.perf_counter()
+        for node in update:
+            timings.append((node, (now - last) * 1000))
+        last = now
+    return timings, (last - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", default="2,8,32", help="comma-separated history lengths in turns")
+    parser.add_argument("--question", default="What courses does she teach?")
+    args = parser.parse_args()
+
+    app = get_app()
+    for turns in [int(t) for t in args.turns.split(",")]:
+        messages = conversation(turns)
+        for mode in ("transcript", "standalone"):
+            state = inputs(mode, messages, args.question)
+            timings, total = node_timings(app, state)
+            prompt_tokens = estimate_tokens(state["question"] + state["history"])
+            print(f"{turns:>4} turns, {mode:<10} ({prompt_tokens:,} input tokens): total {total:,.0f} ms")
+            for node, ms in timings:
+                print(f"    {node:<20} {ms:>9,.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Write throughput of the conversation store, with and without the pool.
+
+Several threads save chat messages into a temporary SQLite file, each
+write inserting a message and touching its conversation the way a chat
+request does. "per-call" opens a fresh connection in the default
+rollback-journal mode for every write, as the handlers did before the
+pool; "pooled" borrows WAL-mode connections from a ConnectionPool.
+
+Usage:
+    python -m models.research.testing_QA.pool_throughput --threads 8 --messages 2000
+"""
+import os
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+# database.py migrates SUPERVAANI_DB_PATH on import; keep it off the real store
+os.environ.setdefault('SUPERVAANI_DB_PATH', os.path.join(tempfile.mkdtemp(prefix="supervaani-bench-"), "supervaani.db"))
+
+import database
+from database import ConnectionPool, migrate
+
+
+def save(conn, thread, n):
+    conn.execute("INSERT INTO messages (id, conversation_id, role, content, seq) VALUES (?, ?, 'user', ?, ?)",
+                 (f"m-{thread}-{n}", f"c-{thread}", "message text " * 20, n + 1))
+    conn.execute("UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?", (f"c-{thread}",))
+    conn.commit()
+
+
+def per_call(path):
+    def write(thread, n):
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            save(conn, thread, n)
+        finally:
+            conn.close()
+    return write
+
+
+def pooled(path, size):
+    database.DB_PATH = path
+    pool = ConnectionPool(size=size)
+
+    def write(thread, n):
+        with pool.connection() as conn:
+            save(conn, thread, n)
+    return write
+
+
+def run(write, threads, messages):
+    per_thread = messages // threads
+
+    def worker(thread):
+        for n in range(per_thread):
+            write(thread, n)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def prepare(path, threads):
+    conn = sqlite3.connect(path, isolation_level=None)
+    migrate(conn)
+    conn.executemany("INSERT INTO conversations (id, user_id, title) VALUES (?, ?, 'Chat')",
+                     [(f"c-{t}", f"user-{t}") for t in range(threads)])
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=database.DB_POOL_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        print(f"{args.messages} messages from {args.threads} threads\n")
+        for name, make in (("per-call", per_call), ("pooled", lambda path: pooled(path, args.pool_size))):
+            # Each mode gets its own file; WAL mode persists in the file header
+            path = os.path.join(root, f"{name}.db")
+            prepare(path, args.threads)
+            print(f"{name:>8}: {run(make(path), args.threads, args.messages):,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
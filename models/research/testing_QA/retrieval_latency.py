@@ -0,0 +1,67 @@
+"""
+Latency of the sql_unified lookup in retrieve_sql, before and after the
+index registry.
+
+"load-per-call" deserialises the index with FAISS.load_local on every
+question, as retrieve_with_metadata did before the VectorStoreRegistry;
+"resident" goes through retrieve_with_metadata, which searches the copy
+the registry keeps in memory. The embedding model is warmed up first and
+both modes share it, so the difference is the index load. Needs the
+embedding model and the sql_unified index.
+
+Usage:
+    python -m models.research.testing_QA.retrieval_latency --samples 50
+"""
+import os
+import time
+import argparse
+
+# Load indexes on demand; the warm-up would compete with the measurement
+os.environ['SUPERVAANI_INDEX_WARMUP'] = '0'
+
+from langchain_community.vectorstores import FAISS
+from models.research.retrieval import embeddings, retrieve_with_metadata, DB_FAISS_SQL_UNIFIED_PATH
+
+QUESTIONS = [
+    "Who teaches machine learning?",
+    "Which professors work on robotics?",
+    "What courses are offered in data science?",
+    "Who is the faculty for signals and systems?",
+]
+
+
+def load_per_call(query):
+    store = FAISS.load_local(DB_FAISS_SQL_UNIFIED_PATH, embeddings, allow_dangerous_deserialization=True)
+    return store.as_retriever(search_kwargs={'k': 2}).invoke(query)
+
+
+def resident(query):
+    return retrieve_with_metadata(query, "sql_unified", k=2)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    # Build the model, fill the query cache and load the resident copy before timing
+    embeddings.warm_up()
+    for question in QUESTIONS:
+        resident(question)
+
+    for name, lookup in (("load-per-call", load_per_call), ("resident", resident)):
+        latencies = []
+        for n in range(args.samples):
+            started = time.perf_counter()
+            lookup(QUESTIONS[n % len(QUESTIONS)])
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"{name:>13}: p50 {percentile(latencies, 0.5):.1f} ms, p95 {percentile(latencies, 0.95):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
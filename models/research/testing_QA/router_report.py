@@ -0,0 +1,76 @@
+"""
+Offline accuracy and latency report for the local question router.
+
+Runs every question of the QBank spreadsheet through the nearest-centroid
+router and the LLM router. The LLM router's label is the reference unless
+the spreadsheet has a column of expected datasource labels.
+
+Usage:
+    python -m models.research.testing_QA.router_report QBank_Final_1Dec2024.xlsx [--label-column Route]
+"""
+import time
+import argparse
+import statistics
+import pandas as pd
+
+from models.research.router import local_router, llm_datasource, DATASOURCE_ROUTES
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", nargs="?", default="QBank_Final_1Dec2024.xlsx")
+    parser.add_argument("--label-column", default=None, help="column with the expected datasource")
+    args = parser.parse_args()
+
+    df = pd.read_excel(args.dataset)
+    questions = df['Questions'].astype(str).tolist()
+    labels = df[args.label_column].tolist() if args.label_column else [None] * len(questions)
+
+    # Build the centroids before timing individual questions
+    local_router.classify("warm up")
+
+    local_ms, llm_ms = [], []
+    confident = agree = confident_agree = 0
+    for question, label in zip(questions, labels):
+        (predicted, scores), elapsed = timed(local_router.classify, question)
+        local_ms.append(elapsed)
+        reference, elapsed = timed(llm_datasource, question) if label is None else (label, 0.0)
+        if label is None:
+            llm_ms.append(elapsed)
+
+        best = next(iter(scores))
+        same = DATASOURCE_ROUTES.get(best) == DATASOURCE_ROUTES.get(reference)
+        agree += same
+        if predicted is not None:
+            confident += 1
+            confident_agree += same
+        elif not same:
+            print(f"low confidence, {best} vs {reference}: {question}")
+
+    total = len(questions)
+    print(f"\nQuestions: {total}")
+    print(f"Reference: {args.label_column or 'LLM router'}")
+    print(f"Top-1 accuracy of the local router: {agree / total:.1%}")
+    print(f"Routed locally (confident): {confident / total:.1%}")
+    if confident:
+        print(f"Accuracy when confident: {confident_agree / confident:.1%}")
+    print(f"Local latency ms: p50 {statistics.median(local_ms):.1f}, p95 {percentile(local_ms, 0.95):.1f}")
+    if llm_ms:
+        print(f"LLM latency ms: p50 {statistics.median(llm_ms):.1f}, p95 {percentile(llm_ms, 0.95):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Memory used by per-user session state and by compiled workflows.
+
+Measures with tracemalloc how much the SessionCache holds for a number of
+simulated users, at the configured cap. With --graphs N it also compares
+one shared compiled workflow against N per-user copies, which is what the
+chat handler kept before the workflow was shared; this needs the full
+model stack installed.
+
+Usage:
+    python -m models.research.testing_QA.session_memory --users 10000 --cap 5000 [--graphs 20]
+"""
+import argparse
+import tracemalloc
+
+from session_cache import SessionCache
+
+
+def measure(func):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = func()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, after - before, peak - before
+
+
+def fill_sessions(users, cap):
+    cache = SessionCache(max_size=cap, sweep_interval=0)
+    for u in range(users):
+        cache.touch(f"user-{u}@example.com")
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--cap", type=int, default=5000)
+    parser.add_argument("--graphs", type=int, default=0, help="per-user compiled workflows to compare")
+    args = parser.parse_args()
+
+    cache, retained, peak = measure(lambda: fill_sessions(args.users, args.cap))
+    print(f"Sessions: {args.users} users, {cache.stats()['size']} resident at a cap of {args.cap}")
+    print(f"  retained {retained / 2**20:.2f} MiB, peak {peak / 2**20:.2f} MiB")
+
+    if args.graphs:
+        from models.research.main import create_app, get_app
+        get_app()
+        _, shared, _ = measure(get_app)
+        graphs, per_user, _ = measure(lambda: [create_app() for _ in range(args.graphs)])
+        print(f"Workflows: shared {shared / 2**20:.2f} MiB, "
+              f"{len(graphs)} per-user copies {per_user / 2**20:.2f} MiB "
+              f"({per_user / len(graphs) / 2**20:.2f} MiB each)")
+
+
+if __name__ == "__main__":
+    main()
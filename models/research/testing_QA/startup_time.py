@@ -0,0 +1,72 @@
+"""
+Startup time of the retrieval module, before and after lazy loading.
+
+Each mode runs in a fresh interpreter. "eager" builds the embedding model
+and loads every index one after another, as importing retrieval.py did
+before LazyEmbeddings and the background warm-up. "lazy" imports
+retrieval.py as the API does now and reports how long the import blocks
+(the time before the server can bind its port) and how long until
+/api/ready would report every index loaded. Needs the embedding model
+and the FAISS indexes.
+
+Usage:
+    python -m models.research.testing_QA.startup_time
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+
+def eager():
+    started = time.perf_counter()
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from langchain_community.vectorstores import FAISS
+    from models.research import retrieval
+    embeddings = HuggingFaceEmbeddings(model_name=retrieval.EMBEDDING_MODEL, model_kwargs={'device': 'cpu'})
+    for path in (retrieval.DB_FAISS_PATH_PERSONNEL, retrieval.DB_FAISS_PATH_OTHERS,
+                 retrieval.DB_FAISS_PATH_LIBRARY, retrieval.DB_FAISS_SQL_UNIFIED_PATH):
+        FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+    return {"blocking": time.perf_counter() - started, "ready": time.perf_counter() - started}
+
+
+def lazy(timeout=600):
+    started = time.perf_counter()
+    from models.research.retrieval import vectorstores
+    blocking = time.perf_counter() - started
+    while not vectorstores.ready():
+        if time.perf_counter() - started > timeout:
+            return {"blocking": blocking, "ready": None}
+        time.sleep(0.01)
+    return {"blocking": blocking, "ready": time.perf_counter() - started}
+
+
+def measure(mode):
+    # A fresh interpreter, so nothing is imported or cached yet
+    output = subprocess.run([sys.executable, "-m", __spec__.name, "--run", mode],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run", choices=("eager", "lazy"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        if args.run == "eager":
+            # The module's own warm-up would overlap the eager loads
+            os.environ['SUPERVAANI_INDEX_WARMUP'] = '0'
+        print(json.dumps(eager() if args.run == "eager" else lazy()))
+        return
+
+    for mode in ("eager", "lazy"):
+        result = measure(mode)
+        ready = "never" if result["ready"] is None else f"{result['ready']:.2f} s"
+        print(f"{mode:>5}: import blocks {result['blocking']:.2f} s, all indexes ready after {ready}")
+
+
+if __name__ == "__main__":
+    main()
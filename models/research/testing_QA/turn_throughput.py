@@ -0,0 +1,79 @@
+"""
+Throughput of saving chat turns, one commit per write vs one per turn.
+
+Each turn creates a conversation, saves the user and assistant messages
+and touches the user's activity, in a temporary SQLite file. "per-write"
+commits each of those writes on its own, as the handlers did before
+ChatTurn; "per-turn" buffers them in a ChatTurn and commits once.
+
+Usage:
+    python -m models.research.testing_QA.turn_throughput --threads 8 --turns 2000
+"""
+import os
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+# database.py migrates SUPERVAANI_DB_PATH on import; keep it off the real store
+os.environ.setdefault('SUPERVAANI_DB_PATH', os.path.join(tempfile.mkdtemp(prefix="supervaani-bench-"), "supervaani.db"))
+
+from database import db_pool, INSERT_MESSAGE
+from idgen import new_id
+from chat_turn import ChatTurn, INSERT_CONVERSATION, TOUCH_CONVERSATION, TOUCH_USER_SESSION
+
+
+def per_write(user_id):
+    conversation_id = new_id("conv")
+    writes = [(INSERT_CONVERSATION, (conversation_id, user_id, "Who teaches AI?"))]
+    for role, content in (("user", "Who teaches AI?"), ("assistant", "answer text " * 40)):
+        writes.append((INSERT_MESSAGE, (new_id("msg"), conversation_id, role, content, conversation_id)))
+        writes.append((TOUCH_CONVERSATION, (conversation_id,)))
+    writes.append((TOUCH_USER_SESSION, (user_id,)))
+    for sql, params in writes:
+        with db_pool.connection() as conn:
+            conn.execute(sql, params)
+            conn.commit()
+
+
+def per_turn(user_id):
+    turn = ChatTurn(new_id("conv"), user_id)
+    turn.create_conversation("Who teaches AI?")
+    turn.add_message(new_id("msg"), "user", "Who teaches AI?")
+    turn.add_message(new_id("msg"), "assistant", "answer text " * 40)
+    turn.commit()
+
+
+def run(save, threads, turns):
+    per_thread = turns // threads
+
+    def worker(thread):
+        for _ in range(per_thread):
+            save(f"user-{thread}")
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    # ChatTurn logs every commit at INFO, which would dominate the timings
+    logging.disable(logging.INFO)
+
+    print(f"{args.turns} turns from {args.threads} threads\n")
+    for name, save in (("per-write", per_write), ("per-turn", per_turn)):
+        print(f"{name:>9}: {run(save, args.threads, args.turns):,.0f} turns/s")
+
+
+if __name__ == "__main__":
+    main()
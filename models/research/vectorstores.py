@@ -0,0 +1,286 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of an index's files for changes
+INDEX_CHECK_INTERVAL = float(os.environ.get('SUPERVAANI_INDEX_CHECK_INTERVAL', 5))
+
+# Files written by FAISS.save_local
+INDEX_FILES = ("index.faiss", "index.pkl")
+
+# Index load states reported by VectorStoreRegistry.status()
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+class LazyEmbeddings(Embeddings):
+    """
+    Embeddings that build the underlying model after import.
+
+    Building the model is deferred from import time to an explicit
+    warm_up(), which the startup warm-up calls on a background thread, or
+    to the first embedding call if that comes first. FAISS indexes only
+    keep a reference to their embeddings while loading, so they can be
+    deserialised while the model is still initialising.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    self._model = self._factory()
+                    logger.info(f"Loaded embedding model in {time.perf_counter() - started:.2f}s")
+        return self._model
+
+    @property
+    def ready(self):
+        return self._model is not None
+
+    def warm_up(self):
+        """
+        Build the model now instead of on first use.
+        """
+        self.model
+
+    def embed_documents(self, texts):
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.model.embed_query(text)
+
+def index_signature(path):
+    """
+    Get a signature that changes whenever the index at path is rewritten.
+
+    The path may be a symlink to a versioned index directory, in which
+    case switching the link to another version changes the signature.
+
+    Returns:
+        tuple: The resolved directory and the (mtime_ns, size) of each index file
+    """
+    resolved = os.path.realpath(path)
+    files = []
+    for filename in INDEX_FILES:
+        stat = os.stat(os.path.join(resolved, filename))
+        files.append((stat.st_mtime_ns, stat.st_size))
+    return resolved, tuple(files)
+
+class IndexEntry:
+    """
+    A registered vectorstore and the signature of the files it was loaded from.
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.store = None
+        self.signature = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.state = NOT_LOADED
+        self.error = None
+        self.load_seconds = None
+
+class VectorStoreRegistry:
+    """
+    Process-wide registry of FAISS vectorstores.
+
+    Each index is deserialised once and kept resident. At most every
+    ``check_interval`` seconds a lookup compares the index's resolved
+    directory and files with those it was loaded from. If they changed,
+    the new version is loaded on a background thread and swapped in with
+    a single reference assignment (read-copy-update). Lookups keep getting
+    the old copy until then, and queries already holding it finish on it,
+    so no query ever waits on a reload or sees a partly loaded index.
+    """
+
+    def __init__(self, embeddings, check_interval=INDEX_CHECK_INTERVAL):
+        self.embeddings = embeddings
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, path):
+        """
+        Register an index directory under a name. Registering again is a no-op.
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = IndexEntry(name, path)
+
+    def get(self, name):
+        """
+        Get a loaded vectorstore, loading or reloading it if needed.
+
+        Args:
+            name (str): The registered name
+
+        Returns:
+            FAISS: The vectorstore
+        """
+        entry = self._entries[name]
+        now = time.monotonic()
+        if entry.store is not None and now - entry.checked_at < self.check_interval:
+            return entry.store
+
+        # Only the first lookup ever waits; later ones use the current copy while another checks
+        if not entry.lock.acquire(blocking=entry.store is None):
+            return entry.store
+        reloading = False
+        try:
+            if entry.store is not None and now - entry.checked_at < self.check_interval:
+                return entry.store
+            entry.checked_at = now
+            try:
+                signature = index_signature(entry.path)
+            except OSError as e:
+                if entry.store is None:
+                    entry.state, entry.error = FAILED, str(e)
+                    raise
+                # Files are being replaced; keep serving the loaded index
+                logger.warning(f"Could not check index {name}: {e}")
+                return entry.store
+            if signature != entry.signature:
+                if entry.store is None:
+                    try:
+                        self._load(entry, signature)
+                    except Exception as e:
+                        entry.state, entry.error = FAILED, str(e)
+                        raise
+                else:
+                    # The reload thread takes over the lock and releases it when done
+                    threading.Thread(target=self._reload, args=(entry, signature),
+                                     name=f"index-reload-{name}", daemon=True).start()
+                    reloading = True
+            return entry.store
+        finally:
+            if not reloading:
+                entry.lock.release()
+
+    def _reload(self, entry, signature):
+        # Runs with entry.lock held on behalf of the lookup that noticed the change
+        try:
+            self._load(entry, signature)
+        except Exception as e:
+            logger.error(f"Failed to reload index {entry.name}, keeping the previous copy: {e}")
+        finally:
+            entry.lock.release()
+
+    def refresh(self, name):
+        """
+        Check an index for a new version now instead of after the check interval.
+        """
+        self._entries[name].checked_at = 0.0
+        self.get(name)
+
+    def version(self, name):
+        """
+        Get a version tag for the loaded copy of an index, loading it if needed.
+
+        The tag changes whenever the index is reloaded from new files.
+        """
+        self.get(name)
+        return self._entries[name].signature
+
+    def _load(self, entry, signature):
+        # Caller holds entry.lock
+        started = time.perf_counter()
+        if entry.store is None:
+            entry.state = LOADING
+        # Load from the resolved directory, so a version switch mid-load cannot mix files
+        resolved = signature[0]
+        store = FAISS.load_local(resolved, self.embeddings, allow_dangerous_deserialization=True)
+
+        # If the files changed while loading, the copy may be torn; try again next time
+        if index_signature(resolved) != signature and entry.store is not None:
+            logger.warning(f"Index {entry.name} changed while loading, keeping the previous copy")
+            entry.checked_at = 0.0
+            return
+        action = "Reloaded" if entry.store is not None else "Loaded"
+        entry.store = store
+        entry.signature = signature
+        entry.state, entry.error = READY, None
+        entry.load_seconds = time.perf_counter() - started
+        logger.info(f"{action} index {entry.name} in {entry.load_seconds:.2f}s")
+
+    def status(self):
+        """
+        Get the load state of every registered index.
+
+        Returns:
+            dict: Per index name, its state, loaded version, load time in seconds and last error
+        """
+        return {
+            name: {
+                'state': entry.state,
+                'version': None if entry.signature is None else os.path.basename(entry.signature[0]),
+                'load_seconds': None if entry.load_seconds is None else round(entry.load_seconds, 3),
+                'error': entry.error
+            }
+            for name, entry in list(self._entries.items())
+        }
+
+    def embeddings_ready(self):
+        """
+        Check whether the embedding model queries need has been built.
+        """
+        return getattr(self.embeddings, "ready", True)
+
+    def ready(self):
+        """
+        Check whether the embedding model and every registered index are loaded.
+        """
+        return self.embeddings_ready() and \
+            all(entry.store is not None for entry in list(self._entries.values()))
+
+    def warm_up(self, max_workers=None):
+        """
+        Load every registered index and the embedding model in parallel.
+
+        Indexes that fail to load are reported by status() and retried on
+        their next lookup; they do not stop the others from loading.
+        """
+        started = time.perf_counter()
+        names = list(self._entries)
+        tasks = len(names) + 1
+        with ThreadPoolExecutor(max_workers=max_workers or tasks, thread_name_prefix="index-warmup") as pool:
+            if hasattr(self.embeddings, "warm_up"):
+                pool.submit(self._warm_up_embeddings)
+            for name in names:
+                pool.submit(self._warm_up_one, name)
+        logger.info(f"Vectorstore warm-up finished in {time.perf_counter() - started:.2f}s")
+
+    def _warm_up_embeddings(self):
+        try:
+            self.embeddings.warm_up()
+        except Exception as e:
+            logger.error(f"Failed to load embedding model: {e}")
+
+    def _warm_up_one(self, name):
+        try:
+            self.get(name)
+        except Exception as e:
+            logger.error(f"Failed to load index {name}: {e}")
+
+    def warm_up_in_background(self):
+        """
+        Start warm_up() on a daemon thread and return immediately.
+        """
+        thread = threading.Thread(target=self.warm_up, name="index-warmup", daemon=True)
+        thread.start()
+        return thread
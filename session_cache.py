@@ -0,0 +1,148 @@
+# session_cache.py
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Session limits, overridable through the environment
+SESSION_CACHE_SIZE = int(os.environ.get('SUPERVAANI_SESSION_CACHE_SIZE', 10000))
+SESSION_TTL = int(os.environ.get('SUPERVAANI_SESSION_TTL', 30 * 60))
+SESSION_SWEEP_INTERVAL = int(os.environ.get('SUPERVAANI_SESSION_SWEEP_INTERVAL', 5 * 60))
+
+class SessionCache:
+    """
+    Bounded, thread-safe LRU of per-user session state with idle expiry.
+
+    Each entry holds the time of the user's last request. When the cache
+    is full the least recently active user is dropped, and sessions idle
+    for longer than ``ttl`` seconds are dropped both when they are next
+    touched and by a background sweeper thread. The sweeper is started on
+    first use, so it also runs in worker processes forked after import.
+    """
+
+    def __init__(self, max_size=SESSION_CACHE_SIZE, ttl=SESSION_TTL,
+                 sweep_interval=SESSION_SWEEP_INTERVAL, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stopped = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def touch(self, user_id):
+        """
+        Record activity for a user, creating the session if needed.
+
+        Returns:
+            bool: True if the user already had a live session
+        """
+        self._ensure_sweeper()
+        now = self._clock()
+        with self._lock:
+            last_time = self._sessions.get(user_id)
+            if last_time is not None and now - last_time > self.ttl:
+                del self._sessions[user_id]
+                self.expirations += 1
+                last_time = None
+            if last_time is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+            self._sessions[user_id] = now
+            self._sessions.move_to_end(user_id)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return last_time is not None
+
+    def remove(self, user_id):
+        """
+        End a user's session.
+
+        Returns:
+            bool: True if the user had a session
+        """
+        with self._lock:
+            return self._sessions.pop(user_id, None) is not None
+
+    def expire(self, timeout=None):
+        """
+        Drop sessions idle for longer than timeout seconds.
+
+        Args:
+            timeout (float): Idle time allowed, defaults to the cache's ttl
+
+        Returns:
+            list: The user IDs that were dropped
+        """
+        cutoff = self._clock() - (self.ttl if timeout is None else timeout)
+        expired = []
+        with self._lock:
+            # Entries are kept in activity order, so stop at the first live one
+            while self._sessions:
+                user_id, last_time = next(iter(self._sessions.items()))
+                if last_time > cutoff:
+                    break
+                self._sessions.popitem(last=False)
+                expired.append(user_id)
+            self.expirations += len(expired)
+        return expired
+
+    def stats(self):
+        """
+        Get cache metrics.
+
+        Returns:
+            dict: Hit, miss, eviction and expiration counts and the resident size
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._sessions),
+                'max_size': self.max_size
+            }
+
+    def _ensure_sweeper(self):
+        if self.sweep_interval <= 0 or self._stopped.is_set():
+            return
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        with self._lock:
+            if self._sweeper is None or not self._sweeper.is_alive():
+                self._sweeper = threading.Thread(target=self._sweep, name="session-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def _sweep(self):
+        while not self._stopped.wait(self.sweep_interval):
+            expired = self.expire()
+            if expired:
+                logger.info(f"Cleaned up {len(expired)} inactive user session(s)")
+
+    def stop(self):
+        """
+        Stop the background sweeper.
+        """
+        self._stopped.set()
+
+    def __contains__(self, user_id):
+        with self._lock:
+            return user_id in self._sessions
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Modules are imported from the repository root, as the servers run them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py migrates SUPERVAANI_DB_PATH on import; keep tests off the real store
+os.environ.setdefault('SUPERVAANI_DB_PATH', os.path.join(tempfile.mkdtemp(prefix="supervaani-test-"), "supervaani.db"))
+
+# Importing models.research.retrieval would start loading the deployment's indexes
+os.environ.setdefault('SUPERVAANI_INDEX_WARMUP', '0')
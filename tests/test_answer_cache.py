@@ -0,0 +1,133 @@
+from models.research.answer_cache import SemanticAnswerCache, is_cacheable
+
+# Unit vectors by question; "who teaches ml" is close to "who teaches machine learning"
+VECTORS = {
+    "who teaches machine learning": [1.0, 0.0, 0.0],
+    "who teaches ml": [0.99, 0.14, 0.0],
+    "what are the library timings": [0.0, 1.0, 0.0],
+    "where is the hostel": [0.0, 0.0, 1.0],
+}
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return VECTORS[text]
+
+
+class FakeVectorStores:
+    def __init__(self):
+        self.versions = {"others": 1, "sql_unified": 1, "personnel": 1, "library": 1}
+
+    def version(self, name):
+        return self.versions[name]
+
+
+class FakeSQLEngine:
+    def __init__(self):
+        self.version = "v1"
+
+    def data_version(self):
+        return self.version
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(**kwargs):
+    stores, engine, clock = FakeVectorStores(), FakeSQLEngine(), Clock()
+    cache = SemanticAnswerCache(FakeEmbeddings(), stores, engine, clock=clock, **kwargs)
+    return cache, stores, engine, clock
+
+
+def test_similar_questions_above_the_threshold_hit():
+    cache, *_ = make_cache(threshold=0.95)
+    cache.store("who teaches machine learning", "faculty", "Professor X")
+
+    assert cache.lookup("who teaches ml", "faculty") == "Professor X"
+    assert cache.lookup("where is the hostel", "faculty") is None
+
+
+def test_threshold_is_respected():
+    cache, *_ = make_cache(threshold=0.995)
+    cache.store("who teaches machine learning", "faculty", "Professor X")
+    assert cache.lookup("who teaches ml", "faculty") is None
+
+
+def test_answers_are_kept_per_route():
+    cache, *_ = make_cache()
+    cache.store("what are the library timings", "retrieve_library", "9 to 5")
+    assert cache.lookup("what are the library timings", "retrieve_other") is None
+    assert cache.lookup("what are the library timings", "retrieve_library") == "9 to 5"
+
+
+def test_reloaded_index_invalidates_only_its_route():
+    cache, stores, *_ = make_cache()
+    cache.store("what are the library timings", "retrieve_library", "9 to 5")
+    cache.store("where is the hostel", "retrieve_other", "Block B")
+
+    stores.versions["others"] = 2
+
+    assert cache.lookup("where is the hostel", "retrieve_other") is None
+    assert cache.lookup("what are the library timings", "retrieve_library") == "9 to 5"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_faculty_answers_follow_the_table_data_version():
+    cache, _, engine, _ = make_cache()
+    cache.store("who teaches machine learning", "faculty", "Professor X")
+
+    engine.version = "v2"
+
+    assert cache.lookup("who teaches machine learning", "faculty") is None
+
+
+def test_faculty_answers_are_not_cached_without_a_data_version():
+    cache, _, engine, _ = make_cache()
+    engine.version = None
+    cache.store("who teaches machine learning", "faculty", "Professor X")
+    assert cache.stats()["size"] == 0
+
+
+def test_entries_expire_after_the_ttl():
+    cache, _, _, clock = make_cache(ttl=60)
+    cache.store("where is the hostel", "retrieve_other", "Block B")
+
+    clock.now += 59
+    assert cache.lookup("where is the hostel", "retrieve_other") == "Block B"
+    clock.now += 2
+    assert cache.lookup("where is the hostel", "retrieve_other") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_oldest_answer_is_evicted_at_the_size_cap():
+    cache, _, _, clock = make_cache(max_size=2)
+    for question in ("where is the hostel", "what are the library timings", "who teaches machine learning"):
+        cache.store(question, "retrieve_other", question.upper())
+        clock.now += 1
+
+    assert cache.lookup("where is the hostel", "retrieve_other") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_zero_disables_the_cache():
+    cache, *_ = make_cache(max_size=0)
+    cache.store("where is the hostel", "retrieve_other", "Block B")
+
+    assert cache.lookup("where is the hostel", "retrieve_other") is None
+    assert cache.embeddings.calls == 0
+    assert cache.stats()["size"] == 0
+
+
+def test_only_first_questions_of_a_conversation_are_cacheable():
+    assert is_cacheable({"question": "What is the email?", "history": "", "standalone_query": "What is the email?"})
+    assert not is_cacheable({"question": "What is the email?", "history": "User: Who teaches ML?\n\n"})
+    assert not is_cacheable({"question": "his email?", "history": "", "standalone_query": "Who is X his email?"})
@@ -0,0 +1,71 @@
+import pytest
+
+from chat_turn import ChatTurn
+from database import db_pool
+from idgen import new_id
+
+
+@pytest.fixture
+def conversation_id():
+    return new_id("conv")
+
+
+def stored_messages(conversation_id):
+    with db_pool.connection() as conn:
+        return [tuple(row) for row in conn.execute(
+            "SELECT id, role, content, seq FROM messages WHERE conversation_id = ? ORDER BY seq",
+            (conversation_id,))]
+
+
+def conversation_exists(conversation_id):
+    with db_pool.connection() as conn:
+        return conn.execute("SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)).fetchone() is not None
+
+
+def test_commit_writes_conversation_and_messages_in_order(conversation_id):
+    turn = ChatTurn(conversation_id, "user-1")
+    turn.create_conversation("Who teaches AI?")
+    turn.add_message("msg-q", "user", "Who teaches AI?")
+    turn.add_message("msg-a", "assistant", "Professor X")
+
+    assert turn.commit()
+
+    assert conversation_exists(conversation_id)
+    assert stored_messages(conversation_id) == [
+        ("msg-q", "user", "Who teaches AI?", 1),
+        ("msg-a", "assistant", "Professor X", 2),
+    ]
+    with db_pool.connection() as conn:
+        assert conn.execute("SELECT 1 FROM user_sessions WHERE user_id = 'user-1'").fetchone()
+
+
+def test_later_turns_continue_the_sequence(conversation_id):
+    first = ChatTurn(conversation_id, "user-1")
+    first.create_conversation("Hello")
+    first.add_message(new_id("msg"), "user", "Hello")
+    first.add_message(new_id("msg"), "assistant", "Hi")
+    assert first.commit()
+
+    second = ChatTurn(conversation_id, "user-1")
+    second.add_message(new_id("msg"), "user", "And the library?")
+    assert second.commit()
+
+    assert [row[3] for row in stored_messages(conversation_id)] == [1, 2, 3]
+    assert stored_messages(conversation_id)[-1][2] == "And the library?"
+
+
+def test_failed_commit_rolls_back_the_whole_turn(conversation_id):
+    existing = ChatTurn(new_id("conv"), "user-1")
+    existing.create_conversation("Earlier")
+    existing.add_message("msg-taken", "user", "Earlier")
+    assert existing.commit()
+
+    turn = ChatTurn(conversation_id, "user-1")
+    turn.create_conversation("Clashing")
+    turn.add_message(new_id("msg"), "user", "Fine")
+    turn.add_message("msg-taken", "assistant", "Duplicate primary key")
+
+    assert not turn.commit()
+
+    assert not conversation_exists(conversation_id)
+    assert stored_messages(conversation_id) == []
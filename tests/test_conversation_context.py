@@ -0,0 +1,101 @@
+from chat_turn import ChatTurn
+from conversation_context import ConversationContext, ContextCache, estimate_tokens
+from idgen import new_id
+
+
+def message(role, content):
+    return {'role': role, 'content': content}
+
+
+def save_turn(conversation_id, question, answer, new=False):
+    turn = ChatTurn(conversation_id, "user-1")
+    if new:
+        turn.create_conversation(question)
+    turn.add_message(new_id("msg"), "user", question)
+    turn.add_message(new_id("msg"), "assistant", answer)
+    assert turn.commit()
+    return turn
+
+
+def test_context_stays_within_its_token_budget():
+    context = ConversationContext(token_budget=200, summary_tokens=50)
+    for n in range(200):
+        context.append(message("user", f"question {n} " * 10))
+        context.append(message("assistant", f"answer {n} " * 30))
+
+    assert context.tokens <= 200
+    assert estimate_tokens(context.render()) <= 200 + 20
+    assert "answer 199" in context.render()
+
+
+def test_older_questions_are_folded_into_the_summary():
+    context = ConversationContext(token_budget=120, summary_tokens=40)
+    context.append(message("user", "Who teaches machine learning?"))
+    context.append(message("assistant", "Professor A teaches it. " * 5))
+    for n in range(3):
+        context.append(message("user", f"Follow-up {n}"))
+        context.append(message("assistant", "Details " * 20))
+
+    rendered = context.render()
+    assert rendered.startswith("Summary: earlier in this conversation the user asked about: Who teaches machine learning?")
+    assert "Professor A" not in rendered
+    assert rendered.rstrip().endswith("Details")
+
+
+def test_summary_keeps_the_newest_questions_within_its_budget():
+    context = ConversationContext(token_budget=100, summary_tokens=20)
+    for n in range(30):
+        context.append(message("user", f"topic number {n}"))
+        context.append(message("assistant", "x" * 200))
+
+    summary = context.render().split("\n\n")[0]
+    assert "topic number 0;" not in summary
+    assert context._topic_tokens <= 20
+
+
+def test_cached_context_is_reused_until_the_conversation_changes():
+    cache = ContextCache()
+    conversation_id = new_id("conv")
+    save_turn(conversation_id, "Who teaches AI?", "Professor X", new=True)
+
+    first = cache.get(conversation_id)
+    assert cache.get(conversation_id) is first
+    assert first.last_seq == 2
+
+    # Another request writes a turn the cache never saw
+    save_turn(conversation_id, "And their email?", "x@plaksha.edu.in")
+
+    refreshed = cache.get(conversation_id)
+    assert refreshed is not first
+    assert refreshed.last_seq == 4
+    assert "And their email?" in refreshed.render()
+
+
+def test_extend_keeps_the_cache_current_after_a_commit():
+    cache = ContextCache()
+    conversation_id = new_id("conv")
+    save_turn(conversation_id, "Where is the library?", "Block A", new=True)
+    base = cache.get(conversation_id)
+
+    turn = save_turn(conversation_id, "When does it open?", "9 am")
+    cache.extend(conversation_id, base, turn.messages)
+
+    extended = cache.get(conversation_id)
+    assert extended is not base
+    assert extended.last_seq == 4
+    assert "When does it open?" in extended.render()
+    assert cache.get(conversation_id) is extended
+
+
+def test_extend_drops_the_entry_when_another_request_got_there_first():
+    cache = ContextCache()
+    conversation_id = new_id("conv")
+    save_turn(conversation_id, "Hello", "Hi", new=True)
+    base = cache.get(conversation_id)
+    cache.discard(conversation_id)
+    other = cache.get(conversation_id)
+
+    cache.extend(conversation_id, base, [message("user", "late")])
+
+    assert conversation_id not in cache._contexts
+    assert other is not base
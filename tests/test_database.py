@@ -0,0 +1,132 @@
+import time
+import sqlite3
+import threading
+
+import pytest
+
+import database
+from idgen import IdGenerator, new_id
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "supervaani.db", isolation_level=None)
+    database.migrate(conn)
+    yield conn
+    conn.close()
+
+
+def query_plan(conn, sql, params):
+    return " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def test_migrate_records_latest_version(conn):
+    assert database.get_schema_version(conn) == database.MIGRATIONS[-1][0]
+    assert database.migrate(conn) == database.MIGRATIONS[-1][0]
+
+
+def test_history_reads_messages_in_sequence_order_from_index(conn):
+    plan = query_plan(conn, database.CONVERSATION_HISTORY, ("c-1",))
+    assert "USING INDEX idx_messages_conversation_seq" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_conversation_list_is_covered_by_index(conn):
+    plan = query_plan(conn, database.USER_CONVERSATIONS, ("user-1", 10, 0))
+    assert "USING COVERING INDEX idx_conversations_user_updated" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_migration_numbers_existing_messages_in_order(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db", isolation_level=None)
+    version, _, statements = database.MIGRATIONS[0]
+    for statement in statements:
+        conn.execute(statement)
+    conn.execute(f"PRAGMA user_version = {version}")
+    conn.execute("INSERT INTO conversations (id, user_id, title) VALUES ('c-1', 'user-1', 'Chat')")
+    for message_id, timestamp in (("b", "2024-01-01 10:00:02"), ("a", "2024-01-01 10:00:01")):
+        conn.execute("INSERT INTO messages (id, conversation_id, role, content, timestamp) "
+                     "VALUES (?, 'c-1', 'user', 'hi', ?)", (message_id, timestamp))
+
+    database.migrate(conn)
+
+    assert [row[0] for row in conn.execute(database.CONVERSATION_HISTORY, ("c-1",))] == ["a", "b"]
+    conn.close()
+
+
+class FakeConnection:
+    in_transaction = False
+
+    def close(self):
+        pass
+
+
+def test_pool_waiter_gets_a_slot_freed_by_a_discarded_connection():
+    pool = database.ConnectionPool(size=1, connect=FakeConnection)
+    held = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()), daemon=True)
+    waiter.start()
+    time.sleep(0.05)
+
+    pool._discard(held)
+    waiter.join(timeout=2)
+
+    assert not waiter.is_alive()
+    assert acquired and acquired[0] is not held
+
+
+def test_pool_times_out_when_exhausted():
+    pool = database.ConnectionPool(size=1, connect=FakeConnection)
+    pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire(timeout=0.05)
+
+
+def test_ids_are_unique_and_increasing_across_threads():
+    generator = IdGenerator()
+    per_thread = [[] for _ in range(8)]
+
+    def generate(ids):
+        for _ in range(2000):
+            ids.append(generator.new_id("msg"))
+
+    threads = [threading.Thread(target=generate, args=(ids,)) for ids in per_thread]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({i for ids in per_thread for i in ids}) == 8 * 2000
+    for ids in per_thread:
+        assert ids == sorted(ids)
+
+
+def test_ids_keep_increasing_when_the_clock_steps_back():
+    ticks = iter([2_000_000_000, 1_000_000_000, 1_000_000_000])
+    generator = IdGenerator(clock=lambda: next(ticks))
+    ids = [generator.new_id() for _ in range(3)]
+    assert ids == sorted(ids) and len(set(ids)) == 3
+
+
+def test_concurrent_writers_get_consecutive_seqs():
+    conversation_id = new_id("conv")
+    with database.db_pool.transaction() as c:
+        c.execute("INSERT INTO conversations (id, user_id, title) VALUES (?, 'user-1', 'Chat')", (conversation_id,))
+
+    def write(thread):
+        for n in range(20):
+            with database.db_pool.transaction() as c:
+                c.execute(database.INSERT_MESSAGE,
+                          (new_id("msg"), conversation_id, "user", f"{thread}-{n}", conversation_id))
+
+    threads = [threading.Thread(target=write, args=(t,)) for t in range(database.DB_POOL_SIZE)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with database.db_pool.connection() as c:
+        seqs = [row[0] for row in c.execute(
+            "SELECT seq FROM messages WHERE conversation_id = ? ORDER BY seq", (conversation_id,))]
+    assert seqs == list(range(1, database.DB_POOL_SIZE * 20 + 1))
@@ -0,0 +1,50 @@
+import sqlite3
+
+from models.research.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def persisted_rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+
+
+def test_repeated_queries_are_served_from_cache():
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "test-model", max_size=10)
+    assert cache.embed_query("Hostel  Timings") == cache.embed_query("hostel timings")
+    assert model.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_persisted_file_stays_bounded_while_running(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    cache = CachedEmbeddings(CountingEmbeddings(), "test-model", max_size=5, path=path)
+    for i in range(23):
+        cache.embed_query(f"question {i}")
+    assert persisted_rows(path) <= 2 * cache.max_size
+
+
+def test_newest_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    cache = CachedEmbeddings(CountingEmbeddings(), "test-model", max_size=5, path=path)
+    for i in range(12):
+        cache.embed_query(f"question {i}")
+
+    model = CountingEmbeddings()
+    restarted = CachedEmbeddings(model, "test-model", max_size=5, path=path)
+    restarted.embed_query("question 11")
+    restarted.embed_query("question 0")
+    assert model.calls == 1
+    assert persisted_rows(path) <= 5 + 1
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine
+
+from models.research.faculty_index import FacultyIndex
+
+SCHEMA = [
+    "CREATE TABLE professors (id INTEGER PRIMARY KEY, name TEXT, email TEXT, webpage TEXT)",
+    "CREATE TABLE expertise (id INTEGER PRIMARY KEY, name TEXT)",
+    "CREATE TABLE professor_expertise (professor_id INTEGER, expertise_id INTEGER)",
+    "CREATE TABLE courses_m_2025 (id INTEGER PRIMARY KEY, course_title TEXT, credits INTEGER, course_desc TEXT)",
+    "CREATE TABLE course_professors (course_id INTEGER, professor_id INTEGER)",
+]
+
+PROFESSORS = [
+    (1, "Rucha Joshi", "rucha@example.edu", ["Natural Language Processing"]),
+    (2, "Arjun Mehta", "arjun@example.edu", ["Computer Vision"]),
+    (3, "Meera Iyer", "meera@example.edu", ["Machine Learning", "Data Mining"]),
+    (4, "Kabir Datta", "kabir@example.edu", ["Machine Learning"]),
+]
+COURSES = [(1, "Data Structures and Algorithms", 4, [2])]
+
+
+class FakeDatabase:
+    dialect = "sqlite"
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def run(self, query):
+        with self.engine.connect() as conn:
+            return str(conn.exec_driver_sql(query).fetchall())
+
+
+class FakeSQLEngine:
+    def __init__(self, engine):
+        self.engine = engine
+        self.db = FakeDatabase(engine)
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('faculty') / 'faculty.db'}")
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.exec_driver_sql(statement)
+        topics = {}
+        for professor_id, name, email, expertise in PROFESSORS:
+            conn.exec_driver_sql("INSERT INTO professors VALUES (?, ?, ?, ?)", (professor_id, name, email, ""))
+            for topic in expertise:
+                topic_id = topics.setdefault(topic, len(topics) + 1)
+                conn.exec_driver_sql("INSERT OR IGNORE INTO expertise VALUES (?, ?)", (topic_id, topic))
+                conn.exec_driver_sql("INSERT INTO professor_expertise VALUES (?, ?)", (professor_id, topic_id))
+        for course_id, title, credits, teachers in COURSES:
+            conn.exec_driver_sql("INSERT INTO courses_m_2025 VALUES (?, ?, ?, '')", (course_id, title, credits))
+            for professor_id in teachers:
+                conn.exec_driver_sql("INSERT INTO course_professors VALUES (?, ?)", (course_id, professor_id))
+    return FacultyIndex(FakeSQLEngine(engine))
+
+
+def names(documents):
+    return sorted(doc.page_content.split("\n")[0].removeprefix("Name: ") for doc in documents)
+
+
+def test_professor_is_found_by_misspelled_name(index):
+    assert names(index.lookup("What is the email of Ruchaa?")) == ["Rucha Joshi"]
+
+
+def test_topic_and_acronym_find_all_experts(index):
+    assert names(index.lookup("Who works on machine learning?")) == ["Kabir Datta", "Meera Iyer"]
+    assert names(index.lookup("Who teaches DSA?")) == ["Arjun Mehta"]
+
+
+def test_one_shared_word_is_not_a_topic_match(index):
+    assert index.lookup("Who is the head of computer science?") == []
+    assert index.lookup("Where can I find data about admissions?") == []
+
+
+def test_name_and_topic_in_one_question_are_merged(index):
+    question = "Which professor teaches machine learning and what is the email of Rucha?"
+    assert names(index.lookup(question)) == ["Kabir Datta", "Meera Iyer", "Rucha Joshi"]
+
+
+def test_unrelated_question_goes_to_the_llm(index):
+    assert index.lookup("How many credits do I need to graduate?") == []
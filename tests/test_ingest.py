@@ -0,0 +1,221 @@
+import os
+import hashlib
+
+import pytest
+from openpyxl import Workbook
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+from models import ingest_others_data as ingest
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic 8-dimensional vectors derived from the text's hash.
+    """
+
+    def __init__(self):
+        self.embedded = 0
+
+    def _vector(self, text):
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        return [byte / 255 for byte in digest[:8]]
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def write_sheet(path, rows, headers=("Questions", "Answers")):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(headers))
+    for row in rows:
+        sheet.append(list(row))
+    workbook.save(path)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    data = tmp_path / "others_data"
+    data.mkdir()
+    return str(data), str(tmp_path / "vectorstore_others" / "db_faiss")
+
+
+def ingest_now(paths, embeddings, **kwargs):
+    data_path, db_path = paths
+    return ingest.create_vector_db(embeddings=embeddings, data_path=data_path, db_path=db_path,
+                                   workers=1, processes=False, **kwargs)
+
+
+def indexed_questions(db_path):
+    db = FAISS.load_local(db_path, FakeEmbeddings(), allow_dangerous_deserialization=True)
+    assert db.index.ntotal == len(db.docstore._dict)
+    return sorted(doc.metadata['question'] for doc in db.docstore._dict.values())
+
+
+def test_first_run_indexes_every_row(paths):
+    data_path, db_path = paths
+    write_sheet(os.path.join(data_path, "hostel.xlsx"), [("Where is the hostel?", "Block B"),
+                                                         ("Hostel fee?", "1000")])
+    write_sheet(os.path.join(data_path, "library.xlsx"), [("Library timings?", "9 to 5")])
+
+    summary = ingest_now(paths, FakeEmbeddings())
+
+    assert summary['files_added'] == 2
+    assert summary['chunks_added'] == 3 and summary['chunks_total'] == 3
+    assert indexed_questions(db_path) == ["Hostel fee?", "Library timings?", "Where is the hostel?"]
+    manifest = ingest.load_manifest(db_path)
+    assert sorted(manifest['files']) == ["hostel.xlsx", "library.xlsx"]
+
+
+def test_unchanged_files_are_not_embedded_again(paths):
+    data_path, _ = paths
+    write_sheet(os.path.join(data_path, "hostel.xlsx"), [("Where is the hostel?", "Block B")])
+    ingest_now(paths, FakeEmbeddings())
+
+    embeddings = FakeEmbeddings()
+    summary = ingest_now(paths, embeddings)
+
+    assert summary['version'] is None
+    assert embeddings.embedded == 0
+
+
+def test_only_new_files_are_embedded(paths):
+    data_path, db_path = paths
+    write_sheet(os.path.join(data_path, "hostel.xlsx"), [("Where is the hostel?", "Block B")])
+    ingest_now(paths, FakeEmbeddings())
+
+    write_sheet(os.path.join(data_path, "library.xlsx"), [("Library timings?", "9 to 5")])
+    embeddings = FakeEmbeddings()
+    summary = ingest_now(paths, embeddings)
+
+    assert summary['files_added'] == 1 and summary['chunks_added'] == 1
+    assert embeddings.embedded == 1
+    assert indexed_questions(db_path) == ["Library timings?", "Where is the hostel?"]
+
+
+def test_changed_file_replaces_its_rows(paths):
+    data_path, db_path = paths
+    hostel = os.path.join(data_path, "hostel.xlsx")
+    write_sheet(hostel, [("Where is the hostel?", "Block B"), ("Hostel fee?", "1000")])
+    write_sheet(os.path.join(data_path, "library.xlsx"), [("Library timings?", "9 to 5")])
+    ingest_now(paths, FakeEmbeddings())
+
+    write_sheet(hostel, [("Where is the hostel?", "Block C")])
+    summary = ingest_now(paths, FakeEmbeddings())
+
+    assert summary['files_changed'] == 1
+    assert summary['chunks_removed'] == 2 and summary['chunks_added'] == 1
+    assert indexed_questions(db_path) == ["Library timings?", "Where is the hostel?"]
+    db = FAISS.load_local(db_path, FakeEmbeddings(), allow_dangerous_deserialization=True)
+    answers = {doc.metadata['question']: doc.metadata['answer'] for doc in db.docstore._dict.values()}
+    assert answers["Where is the hostel?"] == "Block C"
+
+
+def test_deleted_file_is_removed_from_the_index(paths):
+    data_path, db_path = paths
+    write_sheet(os.path.join(data_path, "hostel.xlsx"), [("Where is the hostel?", "Block B")])
+    write_sheet(os.path.join(data_path, "library.xlsx"), [("Library timings?", "9 to 5")])
+    ingest_now(paths, FakeEmbeddings())
+
+    os.remove(os.path.join(data_path, "hostel.xlsx"))
+    summary = ingest_now(paths, FakeEmbeddings())
+
+    assert summary['files_removed'] == 1 and summary['chunks_removed'] == 1
+    assert indexed_questions(db_path) == ["Library timings?"]
+    assert list(ingest.load_manifest(db_path)['files']) == ["library.xlsx"]
+
+
+def test_each_build_is_published_as_a_new_version(paths):
+    data_path, db_path = paths
+    hostel = os.path.join(data_path, "hostel.xlsx")
+    write_sheet(hostel, [("Where is the hostel?", "Block B")])
+    first = ingest_now(paths, FakeEmbeddings())['version']
+    write_sheet(hostel, [("Where is the hostel?", "Block C")])
+    second = ingest_now(paths, FakeEmbeddings())['version']
+
+    assert os.path.islink(db_path)
+    assert os.path.basename(os.path.realpath(db_path)) == second
+    versions = os.listdir(os.path.join(os.path.dirname(db_path), ingest.VERSIONS_DIR))
+    # The previous build stays for readers still loading it; no staging directory is left
+    assert sorted(versions) == sorted([first, second])
+
+
+def test_old_versions_are_collected(paths):
+    data_path, db_path = paths
+    hostel = os.path.join(data_path, "hostel.xlsx")
+    for n in range(ingest.KEEP_VERSIONS + 2):
+        write_sheet(hostel, [("Where is the hostel?", f"Block {n}")])
+        live = ingest_now(paths, FakeEmbeddings())['version']
+
+    versions = os.listdir(os.path.join(os.path.dirname(db_path), ingest.VERSIONS_DIR))
+    assert len(versions) == ingest.KEEP_VERSIONS
+    assert live in versions
+
+
+def test_full_rebuild_ignores_the_manifest(paths):
+    data_path, _ = paths
+    write_sheet(os.path.join(data_path, "hostel.xlsx"), [("Where is the hostel?", "Block B")])
+    ingest_now(paths, FakeEmbeddings())
+
+    embeddings = FakeEmbeddings()
+    summary = ingest_now(paths, embeddings, full=True)
+
+    assert summary['files_added'] == 1 and embeddings.embedded == 1
+
+
+def test_duplicate_rows_are_indexed_once(paths):
+    data_path, db_path = paths
+    write_sheet(os.path.join(data_path, "hostel.xlsx"), [("Where is the hostel?", "Block B"),
+                                                         ("Where is the hostel?", "Block B")])
+    write_sheet(os.path.join(data_path, "faq.xlsx"), [("where is the hostel?", "block b"),
+                                                      ("Library timings?", "9 to 5")])
+
+    embeddings = FakeEmbeddings()
+    summary = ingest_now(paths, embeddings)
+
+    assert summary['chunks_added'] == 2 and summary['chunks_deduplicated'] == 2
+    assert embeddings.embedded == 2
+    assert len(indexed_questions(db_path)) == 2
+
+
+def test_shared_row_survives_until_its_last_file_is_deleted(paths):
+    data_path, db_path = paths
+    shared = ("Where is the hostel?", "Block B")
+    write_sheet(os.path.join(data_path, "hostel.xlsx"), [shared, ("Hostel fee?", "1000")])
+    write_sheet(os.path.join(data_path, "faq.xlsx"), [shared, ("Library timings?", "9 to 5")])
+    ingest_now(paths, FakeEmbeddings())
+
+    os.remove(os.path.join(data_path, "hostel.xlsx"))
+    summary = ingest_now(paths, FakeEmbeddings())
+
+    # Only the row no other file holds goes; the shared row is still referenced by faq.xlsx
+    assert summary['chunks_removed'] == 1
+    assert indexed_questions(db_path) == ["Library timings?", "Where is the hostel?"]
+
+    os.remove(os.path.join(data_path, "faq.xlsx"))
+    write_sheet(os.path.join(data_path, "library.xlsx"), [("Library timings?", "9 to 5")])
+    summary = ingest_now(paths, FakeEmbeddings())
+
+    assert summary['chunks_removed'] == 2
+    assert indexed_questions(db_path) == ["Library timings?"]
+
+
+def test_changed_file_keeps_a_row_still_shared_with_another_file(paths):
+    data_path, db_path = paths
+    shared = ("Where is the hostel?", "Block B")
+    hostel = os.path.join(data_path, "hostel.xlsx")
+    write_sheet(hostel, [shared])
+    write_sheet(os.path.join(data_path, "faq.xlsx"), [shared])
+    ingest_now(paths, FakeEmbeddings())
+
+    write_sheet(hostel, [("Hostel fee?", "1000")])
+    embeddings = FakeEmbeddings()
+    summary = ingest_now(paths, embeddings)
+
+    assert summary['chunks_removed'] == 0 and embeddings.embedded == 1
+    assert indexed_questions(db_path) == ["Hostel fee?", "Where is the hostel?"]
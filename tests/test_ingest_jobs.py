@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from ingest_jobs import IngestJobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+
+class BlockingRun:
+    """Ingestion stand-in that waits until the test releases it."""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self, progress):
+        self.calls += 1
+        progress("loading", 1, 2)
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.result
+
+
+def wait_for(queue, job_id, state):
+    for _ in range(500):
+        job = queue.get(job_id)
+        if job is not None and job.state == state:
+            return job
+        threading.Event().wait(0.01)
+    pytest.fail(f"job {job_id} never reached {state}")
+
+
+def test_job_state_is_visible_to_another_process():
+    run = BlockingRun(result={"chunks_added": 3})
+    owner = IngestJobQueue(run)
+    # A second queue shares only the database, like another server process
+    other = IngestJobQueue(run)
+
+    job = owner.submit("a.pdf")
+    assert run.started.wait(5)
+    running = other.get(job.id)
+    assert running.state == RUNNING
+    assert running.files == ["a.pdf"]
+    assert (running.stage, running.done, running.total) == ("loading", 1, 2)
+
+    run.release.set()
+    finished = wait_for(other, job.id, SUCCEEDED)
+    assert finished.result == {"chunks_added": 3}
+    assert finished.to_dict()["run_seconds"] is not None
+
+
+def test_failure_is_recorded():
+    run = BlockingRun(error="disk full")
+    run.release.set()
+    jobs = IngestJobQueue(run)
+
+    job = jobs.submit("a.pdf")
+    failed = wait_for(IngestJobQueue(run), job.id, FAILED)
+    assert failed.error == "disk full"
+    assert failed.result is None
+
+
+def test_uploads_join_a_queued_job():
+    run = BlockingRun()
+    jobs = IngestJobQueue(run)
+
+    first = jobs.submit("a.pdf")
+    assert run.started.wait(5)
+    # The running job holds the worker, so the next two uploads share one queued job
+    second = jobs.submit("b.pdf")
+    third = jobs.submit("c.pdf")
+    assert second.id == third.id != first.id
+    stored = jobs.get(second.id)
+    assert stored.state == QUEUED
+    assert stored.files == ["b.pdf", "c.pdf"]
+
+    run.release.set()
+    wait_for(jobs, second.id, SUCCEEDED)
+    assert run.calls == 2
+
+
+def test_unknown_job_is_none():
+    assert IngestJobQueue(BlockingRun()).get("job-missing") is None
+
+
+def test_history_keeps_newest_finished_jobs():
+    run = BlockingRun()
+    run.release.set()
+    jobs = IngestJobQueue(run, history=2)
+
+    ids = []
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        job = jobs.submit(name)
+        wait_for(jobs, job.id, SUCCEEDED)
+        ids.append(job.id)
+    assert jobs.get(ids[0]) is None
+    assert all(jobs.get(job_id) is not None for job_id in ids[1:])
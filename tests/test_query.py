@@ -0,0 +1,37 @@
+import pytest
+
+from models.research.query import condense_question, is_follow_up
+
+HISTORY = "User: Who teaches machine learning?\n\nAssistant: Dr. Rucha teaches it.\n\n"
+
+
+@pytest.mark.parametrize("question", [
+    "Is there a hostel curfew?",
+    "Who should I contact if there is an emergency?",
+    "Tell me more about the founders",
+    "Can I also get a scholarship?",
+    "What is this university known for?",
+    "Is it possible to change my course?",
+    "What is the email of Rucha?",
+])
+def test_self_contained_questions_are_not_follow_ups(question):
+    assert not is_follow_up(question)
+    assert condense_question({"question": question, "history": HISTORY})["standalone_query"] == question
+
+
+@pytest.mark.parametrize("question", [
+    "What is the email?",
+    "What does she teach?",
+    "Give me their webpage",
+    "Who else teaches that course?",
+    "and the credits?",
+])
+def test_follow_ups_are_anchored_on_the_previous_question(question):
+    assert is_follow_up(question)
+    assert condense_question({"question": question, "history": HISTORY})["standalone_query"] == \
+        f"Who teaches machine learning? {question}"
+
+
+def test_follow_up_without_history_is_kept():
+    assert condense_question({"question": "What is the email?", "history": ""})["standalone_query"] == \
+        "What is the email?"
@@ -0,0 +1,92 @@
+import pytest
+
+from models.research import router
+from models.research.local_router import CentroidRouter
+
+EXAMPLES = {
+    "faculty": ["professor", "teacher"],
+    "retrieve_library": ["book", "library"],
+    "others": ["hostel", "fees"],
+}
+
+# One axis per datasource; anything else is spread evenly or lies off all of them
+VECTORS = {
+    "professor": [1.0, 0.0, 0.0, 0.0],
+    "teacher": [0.9, 0.1, 0.0, 0.0],
+    "book": [0.0, 1.0, 0.0, 0.0],
+    "library": [0.1, 0.9, 0.0, 0.0],
+    "hostel": [0.0, 0.0, 1.0, 0.0],
+    "fees": [0.0, 0.1, 0.9, 0.0],
+    "who teaches ml": [0.95, 0.05, 0.0, 0.1],
+    "professor books": [0.7, 0.7, 0.0, 0.1],
+    "weather today": [0.05, 0.05, 0.05, 1.0],
+}
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return VECTORS[text]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+@pytest.fixture
+def centroids():
+    return CentroidRouter(FakeEmbeddings(), EXAMPLES, min_similarity=0.35, min_margin=0.05)
+
+
+def test_confident_question_is_routed_locally(centroids):
+    label, scores = centroids.classify("who teaches ml")
+    assert label == "faculty"
+    assert list(scores) == sorted(scores, key=scores.get, reverse=True)
+
+
+def test_low_similarity_falls_back(centroids):
+    label, scores = centroids.classify("weather today")
+    assert label is None
+    assert max(scores.values()) < 0.35
+
+
+def test_small_margin_falls_back(centroids):
+    label, scores = centroids.classify("professor books")
+    ranked = list(scores.values())
+    assert label is None
+    assert ranked[0] >= 0.35 and ranked[0] - ranked[1] < 0.05
+
+
+class FailingChain:
+    def invoke(self, inputs):
+        raise ConnectionError("ollama is down")
+
+
+class ReplyChain:
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def invoke(self, inputs):
+        self.calls += 1
+        return self.reply
+
+
+def test_route_question_skips_the_llm_when_confident(monkeypatch, centroids):
+    chain = ReplyChain({"datasource": "others"})
+    monkeypatch.setattr(router, "local_router", centroids)
+    monkeypatch.setattr(router, "question_router", chain)
+    assert router.route_question({"question": "who teaches ml"}) == "faculty"
+    assert chain.calls == 0
+
+
+def test_route_question_asks_the_llm_when_unsure(monkeypatch, centroids):
+    monkeypatch.setattr(router, "local_router", centroids)
+    monkeypatch.setattr(router, "question_router", ReplyChain({"datasource": "library"}))
+    assert router.route_question({"question": "professor books"}) == "retrieve_library"
+
+
+def test_failed_llm_falls_back_to_the_best_local_guess(monkeypatch, centroids, caplog):
+    monkeypatch.setattr(router, "local_router", centroids)
+    monkeypatch.setattr(router, "question_router", FailingChain())
+    best_guess = next(iter(centroids.scores("professor books")))
+    assert router.route_question({"question": "professor books"}) == router.DATASOURCE_ROUTES[best_guess]
+    assert "LLM router failed" in caplog.text
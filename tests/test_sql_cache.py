@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import create_engine
+
+from models.research.sql_cache import FACULTY_TABLES, SQLCache, normalize_question
+
+
+class FakeDatabase:
+    dialect = "sqlite"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.reads = 0
+
+    def run(self, query):
+        self.reads += 1
+        with self.engine.connect() as conn:
+            return str(conn.exec_driver_sql(query).fetchall())
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'faculty.db'}")
+    with engine.begin() as conn:
+        for table in FACULTY_TABLES:
+            conn.exec_driver_sql(f"CREATE TABLE {table} (id INTEGER)")
+    return FakeDatabase(engine)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_questions_are_normalised():
+    assert normalize_question("  Who teaches  AI?? ") == normalize_question("who teaches ai")
+
+
+def test_plan_and_result_hits(clock):
+    cache = SQLCache(clock=clock)
+    assert cache.get_plan("Who teaches AI?") is None
+
+    cache.put_plan("Who teaches AI?", "SELECT name FROM professors")
+    cache.put_result(" SELECT name FROM professors ", "[('Rucha',)]")
+
+    sql = cache.get_plan("who teaches ai")
+    assert sql == "SELECT name FROM professors"
+    assert cache.get_result(sql) == "[('Rucha',)]"
+    stats = cache.stats()
+    assert (stats['plan_hits'], stats['plan_misses']) == (1, 1)
+    assert (stats['result_hits'], stats['result_misses']) == (1, 0)
+    assert stats['plan_hit_rate'] == 0.5
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = SQLCache(ttl=60, clock=clock)
+    cache.put_plan("Who teaches AI?", "SELECT 1")
+    cache.put_result("SELECT 1", "[(1,)]")
+
+    clock.now = 60
+    assert cache.get_plan("Who teaches AI?") == "SELECT 1"
+    clock.now = 61
+    assert cache.get_plan("Who teaches AI?") is None
+    assert cache.get_result("SELECT 1") is None
+    assert cache.stats()['expirations'] == 2
+
+
+def test_long_results_are_not_cached(clock):
+    cache = SQLCache(result_max_chars=10, clock=clock)
+    cache.put_result("SELECT 1", "x" * 11)
+    cache.put_result("SELECT 2", "x" * 10)
+
+    assert cache.get_result("SELECT 1") is None
+    assert cache.get_result("SELECT 2") == "x" * 10
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = SQLCache(plan_size=2, clock=clock)
+    cache.put_plan("a", "SELECT 'a'")
+    cache.put_plan("b", "SELECT 'b'")
+    cache.get_plan("a")
+    cache.put_plan("c", "SELECT 'c'")
+
+    assert cache.get_plan("b") is None
+    assert cache.get_plan("a") == "SELECT 'a'"
+    assert cache.stats()['evictions'] == 1
+
+
+def test_faculty_table_change_invalidates_the_cache(db, clock):
+    cache = SQLCache(check_interval=30, clock=clock)
+    assert cache.check_version(db)
+    cache.put_plan("Who teaches AI?", "SELECT 1")
+    cache.put_result("SELECT 1", "[(1,)]")
+
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO professors VALUES (1)")
+    # The version stamp is not read again within the check interval
+    assert cache.check_version(db)
+    assert db.reads == 1
+    assert cache.get_plan("Who teaches AI?") == "SELECT 1"
+
+    clock.now = 30
+    assert cache.check_version(db)
+    assert db.reads == 2
+    assert cache.get_plan("Who teaches AI?") is None
+    assert cache.get_result("SELECT 1") is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_unchanged_tables_keep_the_cache(db, clock):
+    cache = SQLCache(check_interval=0, clock=clock)
+    cache.check_version(db)
+    cache.put_plan("Who teaches AI?", "SELECT 1")
+
+    assert cache.check_version(db)
+    assert cache.get_plan("Who teaches AI?") == "SELECT 1"
+    assert cache.stats()['invalidations'] == 0
+
+
+def test_unreadable_version_bypasses_the_cache(clock):
+    class BrokenDatabase:
+        dialect = "sqlite"
+
+        def run(self, query):
+            raise RuntimeError("no such table: professors")
+
+    cache = SQLCache(clock=clock)
+    assert not cache.check_version(BrokenDatabase())
+    assert cache.version is None
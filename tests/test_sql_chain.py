@@ -0,0 +1,139 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from models.research.sql_cache import FACULTY_TABLES, SQLCache
+from models.research.sql_chain import SQLAttemptStats, SQLEngine, sql_infer
+
+
+class FakeChain:
+    """Text-to-SQL chain that replies with queued SQL, optionally slowly."""
+
+    def __init__(self, *queries, delay=0):
+        self.queries = list(queries)
+        self.delay = delay
+        self.prompts = []
+
+    def invoke(self, inputs):
+        self.prompts.append(inputs["question"])
+        time.sleep(self.delay)
+        return f"```sql\n{self.queries.pop(0)}\n```"
+
+
+class FakeDatabase:
+    dialect = "sqlite"
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def run(self, query):
+        with self.engine.connect() as conn:
+            return str(conn.exec_driver_sql(query).fetchall())
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        for table in FACULTY_TABLES:
+            conn.exec_driver_sql(f"CREATE TABLE {table} (id INTEGER, name TEXT)")
+        conn.exec_driver_sql("INSERT INTO professors VALUES (1, 'Rucha Joshi')")
+    return engine
+
+
+def infer(engine, chain, **kwargs):
+    return sql_infer(FakeDatabase(engine), chain, "Who are the professors?", engine=engine, **kwargs)
+
+
+def test_first_try(engine):
+    stats = SQLAttemptStats()
+    result = infer(engine, FakeChain("SELECT name FROM professors"), stats=stats)
+
+    assert "Rucha Joshi" in result
+    metrics = stats.stats()
+    assert metrics['first_try'] == 1
+    first = metrics['attempts']['1']
+    assert (first['attempts'], first['failures']) == (1, 0)
+    assert 0 <= first['p50_ms'] <= first['p95_ms']
+
+
+def test_failed_sql_is_repaired_with_the_error(engine):
+    stats = SQLAttemptStats()
+    chain = FakeChain("SELECT nme FROM professors", "SELECT name FROM professors")
+    result = infer(engine, chain, stats=stats)
+
+    assert "Rucha Joshi" in result
+    # The repair prompt carries the failed SQL and the database's error
+    assert "SELECT nme FROM professors" in chain.prompts[1]
+    assert "no such column: nme" in chain.prompts[1]
+    metrics = stats.stats()
+    assert metrics['repaired'] == 1 and metrics['first_try'] == 0
+    assert metrics['attempts']['1']['failures'] == 1
+    assert metrics['attempts']['2']['failures'] == 0
+
+
+def test_unsafe_sql_is_repaired(engine):
+    chain = FakeChain("DELETE FROM professors", "SELECT name FROM professors")
+    assert "Rucha Joshi" in infer(engine, chain)
+    assert len(chain.prompts) == 2
+
+
+def test_attempts_are_bounded(engine):
+    stats = SQLAttemptStats()
+    chain = FakeChain(*["SELECT nme FROM professors"] * 3)
+    result = infer(engine, chain, max_attempts=2, stats=stats)
+
+    assert result.startswith("Error:")
+    assert len(chain.prompts) == 2
+    metrics = stats.stats()
+    assert metrics['failed'] == 1
+    assert [metrics['attempts'][n]['failures'] for n in ('1', '2')] == [1, 1]
+
+
+def test_budget_stops_repairs(engine):
+    stats = SQLAttemptStats()
+    # Each attempt takes 200 ms, so a 300 ms budget has no room for a second one
+    chain = FakeChain(*["SELECT nme FROM professors"] * 3, delay=0.2)
+    result = infer(engine, chain, budget_ms=300, stats=stats)
+
+    assert result.startswith("Error:")
+    assert len(chain.prompts) == 1
+    metrics = stats.stats()
+    assert metrics['budget_exhausted'] == 1 and metrics['failed'] == 0
+    assert list(metrics['attempts']) == ['1']
+
+
+def test_slow_generation_is_abandoned_at_the_budget(engine):
+    stats = SQLAttemptStats()
+    started = time.monotonic()
+    result = infer(engine, FakeChain("SELECT name FROM professors", delay=1), budget_ms=200, stats=stats)
+
+    assert result.startswith("Error:") and "budget" in result
+    assert time.monotonic() - started < 0.8
+    assert stats.stats()['attempts']['1']['failures'] == 1
+
+
+def test_repaired_sql_is_cached(engine):
+    cache = SQLCache()
+    chain = FakeChain("SELECT nme FROM professors", "SELECT name FROM professors")
+    infer(engine, chain, cache=cache)
+
+    again = FakeChain()
+    assert "Rucha Joshi" in infer(engine, again, cache=cache)
+    assert again.prompts == []
+    assert cache.get_plan("Who are the professors?") == "SELECT name FROM professors"
+
+
+def test_unconfigured_engine_fails_clearly(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = SQLEngine(uri=None)
+
+    assert not engine.configured
+    with pytest.raises(RuntimeError, match="SUPERVAANI_SQL_DATABASE_URI"):
+        engine.db
+    assert engine.infer("Who teaches AI?").startswith("Error:")
+    assert engine.data_version() is None
+    # Nothing is created in place of the missing database
+    assert list(tmp_path.iterdir()) == []
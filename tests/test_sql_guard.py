@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import StaticPool
+
+from models.research.sql_guard import (
+    SQLTimeoutError, UnsafeSQLError, format_rows, prepare_sql, run_guarded,
+)
+
+
+@pytest.fixture
+def engine():
+    # One shared connection, so a connection left in a bad state is reused
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (id INTEGER, name TEXT)")
+        for i in range(300):
+            conn.exec_driver_sql("INSERT INTO t VALUES (?, ?)", (i, f"n{i}"))
+    return engine
+
+
+def can_write(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO t VALUES (-1, 'written')")
+    return True
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM t",
+    "SELECT 1; DROP TABLE t",
+    "SELECT * FROM t INTO OUTFILE '/tmp/x'",
+    "WITH x AS (DELETE FROM t RETURNING *) SELECT * FROM x",
+    "-- only a comment",
+])
+def test_non_select_sql_is_rejected(sql):
+    with pytest.raises(UnsafeSQLError):
+        prepare_sql(sql)
+
+
+def test_keywords_inside_literals_are_allowed():
+    assert prepare_sql("SELECT * FROM t WHERE name = 'drop; delete'", 10) == \
+        "SELECT * FROM t WHERE name = 'drop; delete' LIMIT 11"
+
+
+def test_rows_are_capped(engine):
+    rows, truncated = run_guarded(engine, "SELECT * FROM t", max_rows=50)
+    assert len(rows) == 50 and truncated
+    rows, truncated = run_guarded(engine, "SELECT * FROM t LIMIT 5;", max_rows=50)
+    assert len(rows) == 5 and not truncated
+
+
+def test_slow_query_times_out_and_connection_is_reset(engine):
+    with pytest.raises(SQLTimeoutError):
+        run_guarded(engine, "SELECT COUNT(*) FROM t a, t b, t c", timeout_ms=100)
+    assert run_guarded(engine, "SELECT COUNT(*) FROM t")[0] == [(300,)]
+    assert can_write(engine)
+
+
+def test_connection_is_reset_when_rollback_fails(engine, monkeypatch):
+    def failing_rollback(self):
+        raise RuntimeError("rollback failed")
+
+    monkeypatch.setattr(Connection, "rollback", failing_rollback)
+    with pytest.raises(RuntimeError):
+        run_guarded(engine, "SELECT * FROM t")
+    monkeypatch.undo()
+    assert can_write(engine)
+
+
+def test_result_text_is_cut_to_the_token_budget():
+    text = format_rows([(i, "x" * 20) for i in range(100)], truncated=True, token_budget=50)
+    assert len(text) < 50 * 4 + 60
+    assert text.endswith("rows)")